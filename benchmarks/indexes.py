@@ -0,0 +1,127 @@
+"""Query plans and latency of the hot lookups with and without their indexes.
+
+Seeds the tables, measures every query, drops the indexes and measures again.
+Everything runs in one transaction that is rolled back at the end, but the
+dropped indexes hold exclusive locks meanwhile, so run it against a scratch
+database migrated to head:
+
+    python -m benchmarks.indexes --users 100000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from src.database import async_engine
+
+
+INDEXES = {
+    "uq_users_email_not_deleted": "users",
+    "uq_sessions_token": "sessions",
+    "ix_sessions_user_id": "sessions",
+    "ix_categories_user_id_id": "categories",
+    "ix_categories_tasks_category_id": "categories_tasks",
+}
+
+
+def get_queries(users: int) -> dict[str, tuple[str, dict]]:
+    user_id = users // 2
+    return {
+        "users by email": (
+            "SELECT * FROM users WHERE email = :email AND is_deleted = false",
+            {"email": f"bench-{user_id}@example.com"},
+        ),
+        "sessions by token": (
+            "SELECT * FROM sessions WHERE token = :token",
+            {"token": f"{user_id:032d}"},
+        ),
+        "sessions by user": (
+            "SELECT * FROM sessions WHERE user_id = :user_id",
+            {"user_id": user_id},
+        ),
+        "categories by user": (
+            "SELECT * FROM categories WHERE user_id = :user_id ORDER BY id LIMIT 100",
+            {"user_id": user_id},
+        ),
+        "links by category": (
+            "SELECT * FROM categories_tasks WHERE category_id = "
+            "(SELECT min(id) FROM categories WHERE user_id = :user_id)",
+            {"user_id": user_id},
+        ),
+    }
+
+
+async def seed(connection: AsyncConnection, users: int, sessions: int, categories: int):
+    await connection.execute(text(
+        "INSERT INTO users (email, name, hash_password, is_email_verified) "
+        "SELECT 'bench-' || i || '@example.com', 'bench', 'x', true FROM generate_series(1, :users) AS i"
+    ), {"users": users})
+    await connection.execute(text(
+        "INSERT INTO sessions (token, expires_in, user_id) "
+        "SELECT lpad((row_number() OVER ())::text, 32, '0'), now() + interval '30 days', users.id "
+        "FROM users CROSS JOIN generate_series(1, :sessions) WHERE users.email LIKE 'bench-%'"
+    ), {"sessions": sessions})
+    await connection.execute(text(
+        "INSERT INTO categories (title, description, user_id) "
+        "SELECT 'category ' || i, 'bench', users.id "
+        "FROM users CROSS JOIN generate_series(1, :categories) AS i WHERE users.email LIKE 'bench-%'"
+    ), {"categories": categories})
+    await connection.execute(text(
+        "INSERT INTO tasks (title, description, user_id) "
+        "SELECT 'task', 'bench', user_id FROM categories WHERE description = 'bench'"
+    ))
+    await connection.execute(text(
+        "INSERT INTO categories_tasks (task_id, category_id) "
+        "SELECT tasks.id, categories.id FROM tasks JOIN categories "
+        "ON categories.user_id = tasks.user_id AND categories.description = 'bench' "
+        "WHERE tasks.description = 'bench' AND tasks.id % :categories = categories.id % :categories"
+    ), {"categories": categories})
+    await connection.execute(text("ANALYZE"))
+
+
+async def measure(connection: AsyncConnection, queries: dict, repeat: int) -> dict:
+    results = {}
+    for name, (query, params) in queries.items():
+        plan = await connection.execute(text(f"EXPLAIN (ANALYZE, COSTS OFF) {query}"), params)
+        plan = [row[0] for row in plan.all()]
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await connection.execute(text(query), params)
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = {"plan": plan[0].strip(), "median_ms": statistics.median(timings)}
+    return results
+
+
+async def main(users: int, sessions: int, categories: int, repeat: int):
+    queries = get_queries(users)
+    async with async_engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            await seed(connection, users, sessions, categories)
+            after = await measure(connection, queries, repeat)
+            for index in INDEXES:
+                await connection.execute(text(f"DROP INDEX {index}"))
+            await connection.execute(text("ANALYZE"))
+            before = await measure(connection, queries, repeat)
+        finally:
+            await transaction.rollback()
+    await async_engine.dispose()
+
+    for name in queries:
+        print(name)
+        print(f"  before: {before[name]['median_ms']:8.3f} ms  {before[name]['plan']}")
+        print(f"  after:  {after[name]['median_ms']:8.3f} ms  {after[name]['plan']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100000)
+    parser.add_argument("--sessions", type=int, default=5, help="sessions per user")
+    parser.add_argument("--categories", type=int, default=10, help="categories per user")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.sessions, args.categories, args.repeat))
@@ -0,0 +1,261 @@
+"""Latency and throughput of the main API endpoints under concurrent load.
+
+Seeds users, sessions, categories and tasks into the configured database,
+drives each scenario with a pool of concurrent clients and prints
+p50/p95/p99 latency, RPS and SQL statements per request. The app runs
+in-process unless --base-url points at a running server (statement counts
+are only available in-process, and a running server needs RATE_LIMIT_ENABLED=false). The seeded users
+get a prefix unique to the run and only their ids are removed at the end, together with everything they own.
+
+    python -m benchmarks.load --concurrency 20 --requests 2000 --out after.json --compare before.json
+"""
+import argparse
+import asyncio
+import contextvars
+import datetime
+import json
+import secrets
+import statistics
+import time
+
+import httpx
+from sqlalchemy import event, text, bindparam, Integer
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from src.database import async_engine
+from src.hasher import hasher
+
+
+EMAIL_PREFIX = f"load-{secrets.token_hex(4)}-"
+PASSWORD = "load-test-password"
+
+statements_counter: contextvars.ContextVar[list | None] = contextvars.ContextVar("statements_counter", default=None)
+
+
+@event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+def count_statement(conn, cursor, statement, parameters, context, executemany):
+    counter = statements_counter.get()
+    if counter is not None:
+        counter[0] += 1
+
+
+def email(index: int) -> str:
+    return f"{EMAIL_PREFIX}{index}@example.com"
+
+
+def user_ids_param(user_ids: list[int]):
+    return bindparam("user_ids", user_ids, type_=ARRAY(Integer))
+
+
+async def seed(users: int, sessions: int, categories: int, tasks: int) -> list[int]:
+    hash_password = await hasher.hash_str(PASSWORD)
+    async with async_engine.begin() as connection:
+        res = await connection.execute(text(
+            "INSERT INTO users (email, name, hash_password, is_email_verified) "
+            "SELECT :prefix || i || '@example.com', 'load', :hash_password, true "
+            "FROM generate_series(0, :users - 1) AS i RETURNING id"
+        ), {"prefix": EMAIL_PREFIX, "hash_password": hash_password, "users": users})
+        user_ids = list(res.scalars().all())
+        await connection.execute(text(
+            "INSERT INTO sessions (token, expires_in, user_id) "
+            "SELECT substr(md5(random()::text || users.id || i), 1, 32), now() + interval '30 days', users.id "
+            "FROM users CROSS JOIN generate_series(1, :sessions) AS i WHERE users.id = ANY(:user_ids)"
+        ).bindparams(user_ids_param(user_ids)), {"sessions": sessions})
+        await connection.execute(text(
+            "INSERT INTO categories (title, description, user_id) "
+            "SELECT 'category ' || i, 'seeded by the load benchmark', users.id "
+            "FROM users CROSS JOIN generate_series(1, :categories) AS i WHERE users.id = ANY(:user_ids)"
+        ).bindparams(user_ids_param(user_ids)), {"categories": categories})
+        await connection.execute(text(
+            "INSERT INTO tasks (title, description, user_id) "
+            "SELECT 'task ' || i, 'seeded by the load benchmark', users.id "
+            "FROM users CROSS JOIN generate_series(1, :tasks) AS i WHERE users.id = ANY(:user_ids)"
+        ).bindparams(user_ids_param(user_ids)), {"tasks": tasks})
+        await connection.execute(text("ANALYZE"))
+    return user_ids
+
+
+async def cleanup(user_ids: list[int]):
+    # only the users this run inserted, their rows go with them through the cascades
+    async with async_engine.begin() as connection:
+        await connection.execute(text("DELETE FROM users WHERE id = ANY(:user_ids)")
+                                 .bindparams(user_ids_param(user_ids)))
+
+
+def summarize(latencies: list[float], errors: int, statements: int, elapsed: float) -> dict:
+    quantiles = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed if elapsed else 0,
+        "p50_ms": quantiles[49],
+        "p95_ms": quantiles[94],
+        "p99_ms": quantiles[98],
+        "statements_per_request": statements / len(latencies) if latencies else 0
+    }
+
+
+async def run_scenario(client: httpx.AsyncClient, make_request, requests: int, concurrency: int) -> dict:
+    latencies = []
+    errors = 0
+    counter = [0]
+    next_index = 0
+
+    async def worker(worker_id: int):
+        nonlocal errors, next_index
+        statements_counter.set(counter)
+        while next_index < requests:
+            index = next_index
+            next_index += 1
+            start = time.perf_counter()
+            response = await make_request(client, worker_id, index)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(worker_id) for worker_id in range(concurrency)))
+    return summarize(latencies, errors, counter[0], time.perf_counter() - start)
+
+
+async def sign_in(client: httpx.AsyncClient, index: int) -> httpx.Response:
+    return await client.post("/auth/sign-in", json={"email": email(index), "password": PASSWORD})
+
+
+async def run(args) -> dict:
+    if args.base_url:
+        client = httpx.AsyncClient(base_url=args.base_url)
+    else:
+        from src.main import app
+        from src.ratelimit import rate_limiter
+        # the benchmark signs in far faster than any real client may
+        rate_limiter.enabled = False
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark")
+
+    user_ids = await seed(args.users, args.sessions, args.categories, args.tasks)
+    results = dict()
+    try:
+        # every worker acts as its own seeded user so refresh rotation stays sequential
+        workers = []
+        created = []
+        for worker_id in range(args.concurrency):
+            response = await sign_in(client, worker_id % args.users)
+            tokens = response.json()["tokens"]
+            workers.append({
+                "headers": {"Authorization": f"Bearer {tokens['access_token']}"},
+                "refresh_token": tokens["refresh_token"]
+            })
+
+        async def sign_in_request(client, worker_id, index):
+            return await sign_in(client, index % args.users)
+
+        async def refresh_request(client, worker_id, index):
+            response = await client.post("/auth/refresh", cookies={"refresh_token": workers[worker_id]["refresh_token"]})
+            if response.status_code == 200:
+                workers[worker_id]["refresh_token"] = response.json()["tokens"]["refresh_token"]
+            return response
+
+        async def create_category_request(client, worker_id, index):
+            response = await client.post("/categories/", headers=workers[worker_id]["headers"],
+                                         json={"title": f"load {index}", "description": "load"})
+            if response.status_code == 200:
+                created.append((worker_id, response.json()["id"]))
+            return response
+
+        async def list_categories_request(client, worker_id, index):
+            return await client.get("/categories/", headers=workers[worker_id]["headers"])
+
+        async def get_category_request(client, worker_id, index):
+            owner_id, id = created[index % len(created)]
+            return await client.get(f"/categories/{id}", headers=workers[owner_id]["headers"])
+
+        async def update_category_request(client, worker_id, index):
+            owner_id, id = created[index % len(created)]
+            return await client.put(f"/categories/{id}", headers=workers[owner_id]["headers"],
+                                    json={"title": f"updated {index}"})
+
+        async def delete_category_request(client, worker_id, index):
+            owner_id, id = created.pop()
+            return await client.delete(f"/categories/{id}", headers=workers[owner_id]["headers"])
+
+        async def list_tasks_request(client, worker_id, index):
+            return await client.get("/tasks/", headers=workers[worker_id]["headers"])
+
+        # these pick from what the create scenario made, there is nothing to pick if every create failed
+        needs_created = {"GET /categories/{id}", "PUT /categories/{id}"}
+        scenarios = {
+            "POST /auth/sign-in": sign_in_request,
+            "POST /auth/refresh": refresh_request,
+            "POST /categories/": create_category_request,
+            "GET /categories/": list_categories_request,
+            "GET /categories/{id}": get_category_request,
+            "PUT /categories/{id}": update_category_request,
+            "GET /tasks/": list_tasks_request,
+        }
+        for name, make_request in scenarios.items():
+            if name in needs_created and not created:
+                print(f"skipping {name}: no category was created")
+                continue
+            results[name] = await run_scenario(client, make_request, args.requests, args.concurrency)
+        # deletes are bounded by what the create scenario left behind
+        if created:
+            results["DELETE /categories/{id}"] = await run_scenario(
+                client, delete_category_request, len(created), args.concurrency)
+    finally:
+        await client.aclose()
+        await cleanup(user_ids)
+        await async_engine.dispose()
+
+    if args.base_url:
+        for result in results.values():
+            result["statements_per_request"] = None
+    return results
+
+
+def print_results(results: dict, baseline: dict | None):
+    print(f"{'endpoint':28} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'stmts':>6} {'errors':>6}")
+    for name, result in results.items():
+        statements = result["statements_per_request"]
+        print(f"{name:28} {result['rps']:9.1f} {result['p50_ms']:9.2f} {result['p95_ms']:9.2f} "
+              f"{result['p99_ms']:9.2f} {'-' if statements is None else f'{statements:.1f}':>6} {result['errors']:6}")
+        if baseline and name in baseline:
+            old = baseline[name]
+            changes = []
+            for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+                if old[key]:
+                    changes.append(f"{key} {(result[key] - old[key]) / old[key] * 100:+.1f}%")
+            print(f"{'':28} vs baseline: {', '.join(changes)}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--sessions", type=int, default=3, help="sessions per user")
+    parser.add_argument("--categories", type=int, default=50, help="categories per user")
+    parser.add_argument("--tasks", type=int, default=100, help="tasks per user")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--requests", type=int, default=1000, help="requests per endpoint")
+    parser.add_argument("--out", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of a previous run to compare against")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)["endpoints"]
+    print_results(results, baseline)
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump({
+                "created_at": datetime.datetime.utcnow().isoformat(),
+                "parameters": {key: value for key, value in vars(args).items() if key not in ("out", "compare")},
+                "endpoints": results
+            }, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Per-row cost of turning category rows into a JSON response body.
+
+Compares the old return path (ORM object -> CategorySchema -> CategoryReturnSchema
+-> response model -> jsonable_encoder -> json) with the current one (column
+tuple -> model_construct -> model_dump -> orjson). Needs no database:
+
+    python -m benchmarks.serialization --rows 10000
+"""
+import argparse
+import json
+import timeit
+from types import SimpleNamespace
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+
+from src.schemas.categories import CategorySchema, CategoryReturnSchema
+from src.repository.categories import tuple_to_category
+
+
+class GetCategoriesResponseModel(BaseModel):
+    categories: list[CategoryReturnSchema]
+
+
+def old_path(rows: list[SimpleNamespace]) -> bytes:
+    categories = [CategorySchema.model_validate(item, from_attributes=True) for item in rows]
+    categories = [CategoryReturnSchema.model_validate(item, from_attributes=True) for item in categories]
+    response = GetCategoriesResponseModel(categories=categories)
+    # FastAPI validates the returned model against the response model before encoding it
+    response = GetCategoriesResponseModel.model_validate(response, from_attributes=True)
+    return json.dumps(jsonable_encoder(response), ensure_ascii=False).encode()
+
+
+def new_path(rows: list[tuple]) -> bytes:
+    categories = [tuple_to_category(item) for item in rows]
+    return orjson.dumps({"categories": [item.model_dump() for item in categories]})
+
+
+def main(rows: int, repeat: int):
+    objects = [SimpleNamespace(id=i, title=f"category {i}", description="description", user_id=1)
+               for i in range(rows)]
+    tuples = [(i, f"category {i}", "description") for i in range(rows)]
+    assert json.loads(old_path(objects)) == json.loads(new_path(tuples))
+
+    for name, func, data in (("old", old_path, objects), ("new", new_path, tuples)):
+        best = min(timeit.repeat(lambda: func(data), number=1, repeat=repeat))
+        print(f"{name}: {best * 1e6 / rows:.2f} us per row ({best * 1000:.1f} ms for {rows} rows)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    main(args.rows, args.repeat)
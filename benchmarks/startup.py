@@ -0,0 +1,101 @@
+"""Cold-start cost of a worker: import time per module and time to first request.
+
+Every measurement runs in a fresh interpreter so nothing is already imported.
+Import times come from `python -X importtime`, the first request is sent
+in-process through the app lifespan to an endpoint that does not touch the
+database. With --import-budget-ms or --first-request-budget-ms the command
+exits with status 1 when a budget is exceeded, so it can gate CI.
+
+    python -m benchmarks.startup --top 15 --import-budget-ms 800 --first-request-budget-ms 1200
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+FIRST_REQUEST_CODE = """
+import asyncio, json, os, time
+start = time.perf_counter()
+import httpx
+from src.main import app
+imported = time.perf_counter()
+
+async def first_request():
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/metrics",
+                                        headers={"Authorization": f"Bearer {os.environ['INTERNAL_TOKEN']}"})
+            return response.status_code
+
+status = asyncio.run(first_request())
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "first_request_ms": (time.perf_counter() - start) * 1000,
+    "status": status
+}))
+"""
+
+
+def run_python(*args: str) -> subprocess.CompletedProcess:
+    # the reaper would race the measured request for the event loop,
+    # /metrics is only served with the internal token
+    env = {**os.environ, "REAPER_ENABLED": "false",
+           "INTERNAL_TOKEN": os.environ.get("INTERNAL_TOKEN") or "startup"}
+    return subprocess.run([sys.executable, *args], capture_output=True, text=True, env=env, check=True)
+
+
+def import_times(module: str) -> dict[str, float]:
+    result = run_python("-X", "importtime", "-c", f"import {module}")
+    times = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # a module imported twice keeps the first, real, measurement
+        times.setdefault(name.strip(), int(cumulative) / 1000)
+    return times
+
+
+def first_request() -> dict:
+    result = run_python("-c", FIRST_REQUEST_CODE)
+    return json.loads(result.stdout.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--top", type=int, default=20, help="slowest modules to show")
+    parser.add_argument("--import-budget-ms", type=float)
+    parser.add_argument("--first-request-budget-ms", type=float)
+    parser.add_argument("--out", help="write the report as JSON to this file")
+    args = parser.parse_args()
+
+    times = import_times(args.module)
+    request = first_request()
+
+    print(f"{'module':50} {'cumulative ms':>14}")
+    for name, cumulative in sorted(times.items(), key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:50} {cumulative:14.1f}")
+    total = times.get(args.module, 0)
+    print(f"\nimport {args.module}: {total:.1f} ms")
+    print(f"first request: {request['first_request_ms']:.1f} ms (status {request['status']})")
+
+    if args.out:
+        with open(args.out, "w") as file:
+            json.dump({"modules": times, "import_ms": total, **request}, file, indent=2)
+
+    over_budget = []
+    if args.import_budget_ms is not None and total > args.import_budget_ms:
+        over_budget.append(f"import {total:.1f} ms > {args.import_budget_ms} ms")
+    if args.first_request_budget_ms is not None and request["first_request_ms"] > args.first_request_budget_ms:
+        over_budget.append(f"first request {request['first_request_ms']:.1f} ms > {args.first_request_budget_ms} ms")
+    if over_budget:
+        print("over budget: " + ", ".join(over_budget))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
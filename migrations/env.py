@@ -13,6 +13,7 @@ from src.models.categories_tasks import CategoriesTasks
 from src.models.tasks import Tasks
 from src.models.categories import Categories
 from src.models.sessions import Sessions
+from src.models.tombstones import Tombstones
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -23,7 +24,7 @@ section = config.config_ini_section
 config.set_section_option(section, "DB_USER", DB_USER)
 config.set_section_option(section, "DB_PASS", DB_PASS)
 config.set_section_option(section, "DB_HOST", DB_HOST)
-config.set_section_option(section, "DB_PORT", DB_PORT)
+config.set_section_option(section, "DB_PORT", str(DB_PORT))
 config.set_section_option(section, "DB_NAME", DB_NAME)
 
 # Interpret the config file for Python logging.
@@ -0,0 +1,29 @@
+"""cover category version in the user_id, id index
+
+Revision ID: a4e6d0b8c271
+Revises: f1a7c3d95b20
+Create Date: 2026-10-18 16:02:44.915382
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "a4e6d0b8c271"
+down_revision: Union[str, None] = "f1a7c3d95b20"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ETag checks read the version with an index-only scan
+    op.drop_index("ix_categories_user_id_id", table_name="categories")
+    op.create_index("ix_categories_user_id_id", "categories", ["user_id", "id"], postgresql_include=["version"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_categories_user_id_id", table_name="categories")
+    op.create_index("ix_categories_user_id_id", "categories", ["user_id", "id"])
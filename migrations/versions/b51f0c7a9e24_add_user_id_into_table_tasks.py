@@ -0,0 +1,64 @@
+"""add user_id into table tasks
+
+Revision ID: b51f0c7a9e24
+Revises: 73f485fc33e7
+Create Date: 2026-10-18 10:12:41.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b51f0c7a9e24"
+down_revision: Union[str, None] = "73f485fc33e7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def check_no_rows(connection, query: str, problem: str):
+    ids = connection.execute(sa.text(query)).scalars().all()
+    if ids:
+        shown = ", ".join(map(str, ids[:20])) + (", ..." if len(ids) > 20 else "")
+        raise RuntimeError(f"Can't add tasks.user_id: {problem} (task ids {shown}). "
+                           f"Give these tasks an owner by hand and run the migration again.")
+
+
+def upgrade() -> None:
+    connection = op.get_bind()
+    # tasks created before ownership existed belong to the owner of their categories,
+    # a task nobody owns or several users own can't be assigned without a person deciding
+    check_no_rows(
+        connection,
+        "SELECT categories_tasks.task_id FROM categories_tasks "
+        "JOIN categories ON categories.id = categories_tasks.category_id "
+        "GROUP BY categories_tasks.task_id HAVING count(DISTINCT categories.user_id) > 1 "
+        "ORDER BY categories_tasks.task_id",
+        "these tasks are linked to categories of several users"
+    )
+    check_no_rows(
+        connection,
+        "SELECT tasks.id FROM tasks WHERE NOT EXISTS "
+        "(SELECT 1 FROM categories_tasks WHERE categories_tasks.task_id = tasks.id) "
+        "ORDER BY tasks.id",
+        "these tasks are not linked to any category"
+    )
+    op.add_column("tasks", sa.Column("user_id", sa.Integer(), nullable=True))
+    op.execute(
+        "UPDATE tasks SET user_id = categories.user_id "
+        "FROM categories_tasks JOIN categories ON categories.id = categories_tasks.category_id "
+        "WHERE categories_tasks.task_id = tasks.id"
+    )
+    op.alter_column("tasks", "user_id", nullable=False)
+    op.create_foreign_key(
+        "tasks_user_id_fkey", "tasks", "users", ["user_id"], ["id"], ondelete="CASCADE"
+    )
+    op.create_index("ix_tasks_user_id", "tasks", ["user_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_tasks_user_id", table_name="tasks")
+    op.drop_constraint("tasks_user_id_fkey", "tasks", type_="foreignkey")
+    op.drop_column("tasks", "user_id")
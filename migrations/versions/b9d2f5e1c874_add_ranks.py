@@ -0,0 +1,34 @@
+"""add ranks to categories and tasks
+
+Revision ID: b9d2f5e1c874
+Revises: a4e6d0b8c271
+Create Date: 2026-10-18 17:11:36.204518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "b9d2f5e1c874"
+down_revision: Union[str, None] = "a4e6d0b8c271"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ("categories", "tasks"):
+        op.add_column(table, sa.Column("rank", sa.Numeric(), server_default=sa.text("0"), nullable=False))
+        # existing rows keep the order they were created in
+        op.execute(f"UPDATE {table} SET rank = ordered.rank FROM ("
+                   f"SELECT id, row_number() OVER (PARTITION BY user_id ORDER BY id) AS rank FROM {table}"
+                   f") AS ordered WHERE {table}.id = ordered.id")
+        op.create_index(f"ix_{table}_user_id_rank", table, ["user_id", "rank", "id"])
+
+
+def downgrade() -> None:
+    for table in ("categories", "tasks"):
+        op.drop_index(f"ix_{table}_user_id_rank", table_name=table)
+        op.drop_column(table, "rank")
@@ -0,0 +1,42 @@
+"""add indexes for hot lookups
+
+Revision ID: c7d2e94a1f38
+Revises: b51f0c7a9e24
+Create Date: 2026-10-18 11:02:17.604931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c7d2e94a1f38"
+down_revision: Union[str, None] = "b51f0c7a9e24"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "uq_users_email_not_deleted",
+        "users",
+        ["email"],
+        unique=True,
+        postgresql_where=sa.text("is_deleted = false"),
+    )
+    op.create_index("uq_sessions_token", "sessions", ["token"], unique=True)
+    op.create_index("ix_sessions_user_id", "sessions", ["user_id"])
+    op.create_index("ix_categories_user_id_id", "categories", ["user_id", "id"])
+    op.create_index(
+        "ix_categories_tasks_category_id", "categories_tasks", ["category_id"]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_categories_tasks_category_id", table_name="categories_tasks")
+    op.drop_index("ix_categories_user_id_id", table_name="categories")
+    op.drop_index("ix_sessions_user_id", table_name="sessions")
+    op.drop_index("uq_sessions_token", table_name="sessions")
+    op.drop_index("uq_users_email_not_deleted", table_name="users")
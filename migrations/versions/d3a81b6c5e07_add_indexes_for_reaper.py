@@ -0,0 +1,33 @@
+"""add indexes for reaper
+
+Revision ID: d3a81b6c5e07
+Revises: c7d2e94a1f38
+Create Date: 2026-10-18 11:48:53.117380
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "d3a81b6c5e07"
+down_revision: Union[str, None] = "c7d2e94a1f38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_sessions_expires_in", "sessions", ["expires_in"])
+    op.create_index(
+        "ix_users_unverified_created_at",
+        "users",
+        ["created_at"],
+        postgresql_where=sa.text("is_email_verified = false"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_unverified_created_at", table_name="users")
+    op.drop_index("ix_sessions_expires_in", table_name="sessions")
@@ -0,0 +1,44 @@
+"""add search vectors
+
+Revision ID: e8f4b2a6d913
+Revises: d3a81b6c5e07
+Create Date: 2026-10-18 14:05:27.604118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e8f4b2a6d913"
+down_revision: Union[str, None] = "d3a81b6c5e07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# kept inline so the migration doesn't change if src.search does
+SEARCH_VECTOR = ("setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+                 "setweight(to_tsvector('simple', coalesce(description, '')), 'B')")
+
+
+def upgrade() -> None:
+    # lets the GIN indexes lead with the integer user_id
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+    for table in ("categories", "tasks"):
+        op.add_column(table, sa.Column(
+            "search_vector",
+            postgresql.TSVECTOR(),
+            sa.Computed(SEARCH_VECTOR, persisted=True),
+            nullable=False
+        ))
+        op.create_index(f"ix_{table}_user_id_search_vector", table, ["user_id", "search_vector"],
+                        postgresql_using="gin")
+
+
+def downgrade() -> None:
+    for table in ("tasks", "categories"):
+        op.drop_index(f"ix_{table}_user_id_search_vector", table_name=table)
+        op.drop_column(table, "search_vector")
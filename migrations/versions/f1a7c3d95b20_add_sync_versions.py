@@ -0,0 +1,168 @@
+"""add sync versions and tombstones
+
+Revision ID: f1a7c3d95b20
+Revises: e8f4b2a6d913
+Create Date: 2026-10-18 15:21:09.448731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "f1a7c3d95b20"
+down_revision: Union[str, None] = "e8f4b2a6d913"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column("users", sa.Column("change_seq", sa.BigInteger(), server_default=sa.text("0"), nullable=False))
+    op.add_column("users", sa.Column("sync_floor", sa.BigInteger(), server_default=sa.text("0"), nullable=False))
+    for table in ("categories", "tasks", "categories_tasks"):
+        op.add_column(table, sa.Column("version", sa.BigInteger(), server_default=sa.text("0"), nullable=False))
+
+    op.create_table(
+        "tombstones",
+        sa.Column("id", sa.BigInteger(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("entity", sa.String(length=16), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=True),
+        sa.Column("version", sa.BigInteger(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), server_default=sa.text("TIMEZONE('UTC', NOW())"), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_tombstones_user_id_version", "tombstones", ["user_id", "version"])
+    op.create_index("ix_tombstones_created_at", "tombstones", ["created_at"])
+
+    # number the existing rows per user, before the triggers exist
+    op.execute(
+        "CREATE TEMPORARY TABLE sync_backfill ON COMMIT DROP AS "
+        "SELECT entity, entity_id, category_id, user_id, "
+        "row_number() OVER (PARTITION BY user_id ORDER BY entity, entity_id, category_id) AS version "
+        "FROM ("
+        "SELECT 'category' AS entity, id AS entity_id, NULL::integer AS category_id, user_id FROM categories "
+        "UNION ALL SELECT 'task', id, NULL, user_id FROM tasks "
+        "UNION ALL SELECT 'link', categories_tasks.task_id, categories_tasks.category_id, tasks.user_id "
+        "FROM categories_tasks JOIN tasks ON tasks.id = categories_tasks.task_id"
+        ") AS entities"
+    )
+    op.execute(
+        "UPDATE categories SET version = sync_backfill.version FROM sync_backfill "
+        "WHERE sync_backfill.entity = 'category' AND sync_backfill.entity_id = categories.id"
+    )
+    op.execute(
+        "UPDATE tasks SET version = sync_backfill.version FROM sync_backfill "
+        "WHERE sync_backfill.entity = 'task' AND sync_backfill.entity_id = tasks.id"
+    )
+    op.execute(
+        "UPDATE categories_tasks SET version = sync_backfill.version FROM sync_backfill "
+        "WHERE sync_backfill.entity = 'link' AND sync_backfill.entity_id = categories_tasks.task_id "
+        "AND sync_backfill.category_id = categories_tasks.category_id"
+    )
+    op.execute(
+        "UPDATE users SET change_seq = versions.version "
+        "FROM (SELECT user_id, max(version) AS version FROM sync_backfill GROUP BY user_id) AS versions "
+        "WHERE versions.user_id = users.id"
+    )
+
+    op.create_index("ix_categories_user_id_version", "categories", ["user_id", "version"])
+    op.create_index("ix_tasks_user_id_version", "tasks", ["user_id", "version"])
+
+    # the users row stays locked until commit, so one user's versions always commit in order
+    # and a client cursor never skips a change that committed late.
+    # Versions are reserved in blocks that double up to 1024, the unused rest of a block is kept
+    # in a transaction-local setting, so a statement writing N rows updates the users row about
+    # log2(N) + N / 1024 times instead of N; a rolled back savepoint takes its reservation and the
+    # setting back together, and numbers left unused at commit are only gaps between versions
+    op.execute("""
+        CREATE FUNCTION next_change_seq(owner_id integer) RETURNS bigint AS $$
+        DECLARE
+            setting text := 'sync.change_seq_' || owner_id;
+            reserved bigint[] := string_to_array(nullif(current_setting(setting, true), ''), ',')::bigint[];
+            block bigint := 1;
+            last_seq bigint;
+        BEGIN
+            IF reserved IS NOT NULL THEN
+                IF reserved[1] <= reserved[2] THEN
+                    PERFORM set_config(setting, concat_ws(',', reserved[1] + 1, reserved[2], reserved[3]), true);
+                    RETURN reserved[1];
+                END IF;
+                block := least(reserved[3] * 2, 1024);
+            END IF;
+            UPDATE users SET change_seq = change_seq + block WHERE id = owner_id RETURNING change_seq INTO last_seq;
+            IF last_seq IS NULL THEN
+                RETURN NULL;
+            END IF;
+            PERFORM set_config(setting, concat_ws(',', last_seq - block + 2, last_seq, block), true);
+            RETURN last_seq - block + 1;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION sync_set_version() RETURNS trigger AS $$
+        BEGIN
+            IF TG_TABLE_NAME = 'categories_tasks' THEN
+                NEW.version := coalesce(next_change_seq((SELECT user_id FROM tasks WHERE id = NEW.task_id)), 0);
+            ELSE
+                NEW.version := coalesce(next_change_seq(NEW.user_id), 0);
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE FUNCTION sync_record_delete() RETURNS trigger AS $$
+        DECLARE
+            owner_id integer;
+            seq bigint;
+        BEGIN
+            IF TG_TABLE_NAME = 'categories_tasks' THEN
+                SELECT user_id INTO owner_id FROM tasks WHERE id = OLD.task_id;
+            ELSE
+                owner_id := OLD.user_id;
+            END IF;
+            -- cascaded from a deleted user or task, the parent's own tombstone covers it;
+            -- checked here because a block reserved earlier in the transaction outlives the user
+            IF NOT EXISTS (SELECT 1 FROM users WHERE id = owner_id) THEN
+                RETURN OLD;
+            END IF;
+            seq := next_change_seq(owner_id);
+            IF TG_TABLE_NAME = 'categories_tasks' THEN
+                INSERT INTO tombstones (user_id, entity, entity_id, category_id, version)
+                VALUES (owner_id, TG_ARGV[0], OLD.task_id, OLD.category_id, seq);
+            ELSE
+                INSERT INTO tombstones (user_id, entity, entity_id, version)
+                VALUES (owner_id, TG_ARGV[0], OLD.id, seq);
+            END IF;
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for table, entity in (("categories", "category"), ("tasks", "task"), ("categories_tasks", "link")):
+        op.execute(f"CREATE TRIGGER {table}_sync_version BEFORE INSERT OR UPDATE ON {table} "
+                   f"FOR EACH ROW EXECUTE FUNCTION sync_set_version()")
+        op.execute(f"CREATE TRIGGER {table}_sync_delete AFTER DELETE ON {table} "
+                   f"FOR EACH ROW EXECUTE FUNCTION sync_record_delete('{entity}')")
+
+
+def downgrade() -> None:
+    for table in ("categories", "tasks", "categories_tasks"):
+        op.execute(f"DROP TRIGGER {table}_sync_delete ON {table}")
+        op.execute(f"DROP TRIGGER {table}_sync_version ON {table}")
+    op.execute("DROP FUNCTION sync_record_delete()")
+    op.execute("DROP FUNCTION sync_set_version()")
+    op.execute("DROP FUNCTION next_change_seq(integer)")
+    op.drop_index("ix_tasks_user_id_version", table_name="tasks")
+    op.drop_index("ix_categories_user_id_version", table_name="categories")
+    op.drop_index("ix_tombstones_created_at", table_name="tombstones")
+    op.drop_index("ix_tombstones_user_id_version", table_name="tombstones")
+    op.drop_table("tombstones")
+    for table in ("categories_tasks", "tasks", "categories"):
+        op.drop_column(table, "version")
+    op.drop_column("users", "sync_floor")
+    op.drop_column("users", "change_seq")
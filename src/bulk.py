@@ -0,0 +1,94 @@
+import codecs
+import csv
+import io
+from typing import AsyncIterator
+
+import orjson
+from fastapi.exceptions import HTTPException
+from pydantic import ValidationError
+
+from src.schemas.categories import CategoryCreateSchema, CategoryReturnSchema
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+CSV_FIELDS = ["id", "title", "description"]
+
+
+class InvalidCSVHeader(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=400, detail="CSV header must contain title and description")
+
+
+async def iter_lines(stream: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    tail = ""
+    async for chunk in stream:
+        lines = (tail + decoder.decode(chunk)).split("\n")
+        tail = lines.pop()
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+def validate_row(data) -> tuple[CategoryCreateSchema | None, str | None]:
+    try:
+        return CategoryCreateSchema.model_validate(data), None
+    except ValidationError as error:
+        return None, "; ".join(f"{'.'.join(map(str, item['loc'])) or 'row'}: {item['msg']}"
+                               for item in error.errors())
+
+
+async def parse_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, CategoryCreateSchema | None, str | None]]:
+    number = 0
+    async for line in iter_lines(stream):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            data = orjson.loads(line)
+        except orjson.JSONDecodeError as error:
+            yield number, None, f"invalid JSON: {error}"
+            continue
+        yield number, *validate_row(data)
+
+
+async def parse_csv(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, CategoryCreateSchema | None, str | None]]:
+    header = None
+    record = ""
+    number = 0
+    start = 0
+    async for line in iter_lines(stream):
+        number += 1
+        if not record:
+            start = number
+        record = f"{record}\n{line}" if record else line
+        # a quoted field may span several lines, wait until every quote is closed
+        if record.count('"') % 2:
+            continue
+        values = next(csv.reader([record]), [])
+        record = ""
+        if header is None:
+            header = [value.strip() for value in values]
+            if "title" not in header or "description" not in header:
+                raise InvalidCSVHeader
+            continue
+        if not values:
+            continue
+        yield start, *validate_row(dict(zip(header, values)))
+    if record:
+        yield start, None, "unterminated quoted field"
+
+
+def category_to_csv(category: CategoryReturnSchema) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow([category.id, category.title, category.description])
+    return buffer.getvalue()
+
+
+def csv_header() -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(CSV_FIELDS)
+    return buffer.getvalue()
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.config import CACHE_URL, CACHE_SIZE, CACHE_TTL
+
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.data: OrderedDict[Any, tuple[Any, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        item = self.data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        value, expires_at = item
+        if expires_at <= time.time():
+            del self.data[key]
+            self.misses += 1
+            return default
+        self.data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl: float | None = None, expires_at: float | None = None):
+        deadline = time.time() + (self.ttl if ttl is None else ttl)
+        if expires_at is not None:
+            deadline = min(deadline, expires_at)
+        self.data[key] = (value, deadline)
+        self.data.move_to_end(key)
+        while len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def clear(self):
+        self.data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self.data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+class MemoryCacheBackend:
+    def __init__(self, maxsize: int, ttl: float):
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    async def get(self, key: str, field: str) -> bytes | None:
+        fields = self.cache.get(key)
+        if fields is None:
+            return None
+        return fields.get(field)
+
+    async def set(self, key: str, field: str, value: bytes, ttl: float | None = None):
+        fields = self.cache.get(key) or dict()
+        fields[field] = value
+        self.cache.set(key, fields, ttl=ttl)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self.cache.delete(key)
+
+    def stats(self) -> dict:
+        return self.cache.stats()
+
+
+class RedisCacheBackend:
+    def __init__(self, url: str, ttl: float):
+        from redis.asyncio import Redis
+        from redis.exceptions import RedisError
+
+        self.redis = Redis.from_url(url)
+        self.errors = RedisError
+        self.ttl = ttl
+
+    async def get(self, key: str, field: str) -> bytes | None:
+        try:
+            return await self.redis.hget(key, field)
+        except self.errors:
+            logger.warning("Cache read of %s failed", key, exc_info=True)
+            return None
+
+    async def set(self, key: str, field: str, value: bytes, ttl: float | None = None):
+        try:
+            async with self.redis.pipeline(transaction=True) as pipeline:
+                pipeline.hset(key, field, value)
+                pipeline.expire(key, int(self.ttl if ttl is None else ttl))
+                await pipeline.execute()
+        except self.errors:
+            logger.warning("Cache write of %s failed", key, exc_info=True)
+
+    async def delete(self, *keys: str):
+        try:
+            await self.redis.delete(*keys)
+        except self.errors:
+            logger.error("Cache invalidation of %s failed", keys, exc_info=True)
+
+    def stats(self) -> dict:
+        return dict()
+
+
+def create_cache_backend(url: str | None, maxsize: int, ttl: float):
+    if url:
+        return RedisCacheBackend(url, ttl)
+    return MemoryCacheBackend(maxsize, ttl)
+
+
+cache = create_cache_backend(CACHE_URL, CACHE_SIZE, CACHE_TTL)
+pending_invalidations: set[asyncio.Task] = set()
+
+
+async def fill(session: AsyncSession, backend, key: str, field: str, value: bytes):
+    # cache misses are read through src.database.primary_session, rows that still came
+    # from a replica may be older than the last invalidation and are not kept
+    if session.info.get("replica"):
+        return
+    await backend.set(key, field, value)
+
+
+async def invalidate(session: AsyncSession, backend, *keys: str):
+    # drop the entries now and once more after commit, so a read that raced
+    # with the transaction cannot leave the old rows cached
+    await backend.delete(*keys)
+    session.sync_session.info.setdefault("invalidate", []).append((backend, keys))
+
+
+@event.listens_for(Session, "after_commit")
+def invalidate_after_commit(session: Session):
+    for backend, keys in session.info.pop("invalidate", []):
+        task = asyncio.get_running_loop().create_task(backend.delete(*keys))
+        pending_invalidations.add(task)
+        task.add_done_callback(pending_invalidations.discard)
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_invalidations(session: Session):
+    session.info.pop("invalidate", None)
@@ -3,42 +3,164 @@ import os
 import re
 
 from dotenv import load_dotenv
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 
 
-load_dotenv()
+TIME_REGEX = re.compile(r'((?P<days>\d+?)d)? ?((?P<hours>\d+?)h)? ?((?P<minutes>\d+?)m)? ?((?P<seconds>\d+?)s)?')
+
+
+class ConfigError(Exception):
+    pass
 
 
 def str_to_time(time_str: str)->datetime.timedelta:
-    regex = re.compile(r'((?P<days>\d+?)d)? ?((?P<hours>\d+?)h)? ?((?P<minutes>\d+?)m)? ?((?P<seconds>\d+?)s)?')
-    time_dict = regex.match(time_str).groupdict()
-    for key, value in time_dict.items():
-        if value is None:
-            time_dict[key] = 0
-        else:
-            time_dict[key] = int(time_dict[key])
+    match = TIME_REGEX.fullmatch(time_str.strip())
+    if match is None or not any(match.groupdict().values()):
+        raise ValueError(f"expected a duration like 1d 2h 30m 15s, got {time_str!r}")
+    time_dict = {key: int(value) if value is not None else 0 for key, value in match.groupdict().items()}
     return datetime.timedelta(**time_dict)
 
 
-DB_USER = os.getenv("DB_USER")
-DB_PASS = os.getenv("DB_PASS")
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_NAME = os.getenv("DB_NAME")
+def str_to_rate(rate_str: str)->tuple[int, float]:
+    count, _, period = rate_str.partition("/")
+    if not count.strip().isdigit() or int(count) < 1 or not period:
+        raise ValueError(f"expected a rate like 10/1m, got {rate_str!r}")
+    return int(count), str_to_time(period).total_seconds()
+
+
+class Settings(BaseModel, frozen=True, validate_default=True):
+    DB_USER: str
+    DB_PASS: str
+    DB_HOST: str
+    DB_PORT: int
+    DB_NAME: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # read-only queries go to the replica when it is set, otherwise to the primary
+    DB_REPLICA_HOST: str | None = None
+    DB_REPLICA_PORT: int | None = None
+
+    PASS_SALT: str | None = None
+    HASH_SCRYPT_N: int = 2 ** 14
+    HASH_SCRYPT_R: int = 8
+    HASH_SCRYPT_P: int = 1
+    HASH_WORKERS: int = min(4, os.cpu_count() or 1)
+
+    SECRET_KEY: str
+    ALGORITHM: str
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: float = 300
+    # repositories share this cache, a Redis URL makes it coherent across workers
+    CACHE_URL: str | None = None
+    CACHE_SIZE: int = 10000
+    CACHE_TTL: float = 300
+
+    SMTP_HOST: str | None = None
+    SMTP_PORT: int = 587
+    SMTP_USER: str | None = None
+    SMTP_PASS: str | None = None
+    SMTP_STARTTLS: bool = True
+    SMTP_TIMEOUT: float = 10
+
+    EMAIL_CHECK_DNS: bool = True
+    EMAIL_DNS_TIMEOUT: float = 3
+    EMAIL_DOMAIN_CACHE_SIZE: int = 10000
+    EMAIL_DOMAIN_CACHE_TTL: float = 3600
+    EMAIL_DOMAIN_NEGATIVE_TTL: float = 300
+
+    MAIL_POOL_SIZE: int = 2
+    MAIL_BATCH_SIZE: int = 20
+    MAIL_QUEUE_SIZE: int = 1000
+    MAIL_MAX_RETRIES: int = 5
+    MAIL_RETRY_BACKOFF: float = 1
+
+    EXP_ACCESS: datetime.timedelta
+    EXP_EMAIL: datetime.timedelta
+    EXP_REFRESH: datetime.timedelta
 
+    # sign-in keeps the newest SESSIONS_PER_USER - 1 sessions and adds one
+    SESSIONS_PER_USER: int = Field(default=5, ge=1)
 
-PASS_SALT = os.getenv("PASS_SALT")
+    BULK_CHUNK_SIZE: int = 1000
 
+    # a moved item gets the midpoint of its neighbours, past this many decimal places
+    # the list is renumbered in the background
+    RANK_MAX_SCALE: int = 24
 
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
+    SLOW_REQUEST_MS: float = 500
+    # /metrics and /stats expose pool internals and per-route numbers, they are served only
+    # to requests with "Authorization: Bearer <INTERNAL_TOKEN>" and do not exist while it is unset
+    INTERNAL_TOKEN: str | None = None
+
+    # limits are "count/period", a burst of count requests refilled evenly over the period;
+    # buckets live in this Redis (or CACHE_URL) when set, so the limits hold across workers
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_URL: str | None = None
+    RATE_LIMIT_SIZE: int = 100000
+    RATE_LIMIT_TRUST_FORWARDED: bool = False
+    RATE_LIMIT_SIGN_IN_IP: tuple[int, float] = "20/1m"
+    RATE_LIMIT_SIGN_IN_EMAIL: tuple[int, float] = "5/1m"
+    RATE_LIMIT_SIGN_UP_IP: tuple[int, float] = "5/10m"
+    RATE_LIMIT_SIGN_UP_EMAIL: tuple[int, float] = "3/1h"
+    RATE_LIMIT_REFRESH_IP: tuple[int, float] = "60/1m"
+
+    # a client whose buffer fills up is disconnected, it reconnects and syncs
+    EVENTS_QUEUE_SIZE: int = 100
+    EVENTS_PING_INTERVAL: float = 15
+    EVENTS_HEALTH_CHECK_INTERVAL: float = 30
+    EVENTS_RECONNECT_BACKOFF: float = 1
+
+    REAPER_ENABLED: bool = True
+    REAPER_INTERVAL: datetime.timedelta = datetime.timedelta(minutes=10)
+    REAPER_BATCH_SIZE: int = 1000
+    REAPER_UNVERIFIED_TTL: datetime.timedelta = datetime.timedelta(days=7)
+    # clients that have not synced for longer than this must start over from since=0
+    SYNC_TOMBSTONE_TTL: datetime.timedelta = datetime.timedelta(days=30)
+
+    @field_validator("EXP_ACCESS", "EXP_EMAIL", "EXP_REFRESH", "REAPER_INTERVAL", "REAPER_UNVERIFIED_TTL",
+                     "SYNC_TOMBSTONE_TTL", mode="before")
+    @classmethod
+    def parse_time(cls, value):
+        if isinstance(value, str):
+            return str_to_time(value)
+        return value
+
+    @field_validator("RATE_LIMIT_SIGN_IN_IP", "RATE_LIMIT_SIGN_IN_EMAIL", "RATE_LIMIT_SIGN_UP_IP",
+                     "RATE_LIMIT_SIGN_UP_EMAIL", "RATE_LIMIT_REFRESH_IP", mode="before")
+    @classmethod
+    def parse_rate(cls, value):
+        if isinstance(value, str):
+            return str_to_rate(value)
+        return value
+
+    @model_validator(mode="after")
+    def default_replica_port(self):
+        if self.DB_REPLICA_PORT is None:
+            object.__setattr__(self, "DB_REPLICA_PORT", self.DB_PORT)
+        return self
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> "Settings":
+        values = {name: environ[name] for name in cls.model_fields if environ.get(name, "") != ""}
+        try:
+            return cls.model_validate(values)
+        except ValidationError as error:
+            problems = "; ".join(f"{'.'.join(map(str, item['loc']))}: {item['msg']}" for item in error.errors())
+            raise ConfigError(f"Invalid configuration: {problems}") from None
+
+
+load_dotenv()
 
 
-SMTP_HOST = os.getenv("SMTP_HOST")
-SMTP_PORT = os.getenv("SMTP_PORT")
-SMTP_USER = os.getenv("SMTP_USER")
-SMTP_PASS = os.getenv("SMTP_PASS")
+settings = Settings.from_env()
 
 
-EXP_ACCESS = str_to_time(os.getenv("EXP_ACCESS"))
-EXP_EMAIL = str_to_time(os.getenv("EXP_EMAIL"))
-EXP_REFRESH = str_to_time(os.getenv("EXP_REFRESH"))
+def __getattr__(name: str):
+    # keeps `from src.config import DB_HOST` working, every value comes from the one settings object
+    if name in Settings.model_fields:
+        return getattr(settings, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,24 +1,99 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import time
+from contextlib import asynccontextmanager
+
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine, AsyncEngine
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy import String
 
 from typing import Annotated
 
-from src.config import DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME
+from src.config import (DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, DB_POOL_SIZE, DB_MAX_OVERFLOW,
+                        DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING, DB_STATEMENT_CACHE_SIZE,
+                        DB_REPLICA_HOST, DB_REPLICA_PORT)
 
 
 DB_URL = f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
 
-async_engine = create_async_engine(DB_URL)
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_time = 0.0
+        self.max_wait_time = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            wait_time = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_time += wait_time
+            self.max_wait_time = max(self.max_wait_time, wait_time)
+
+
+def create_engine(host: str, port: int) -> AsyncEngine:
+    url = (f"postgresql+asyncpg://{DB_USER}:{DB_PASS}@{host}:{port}/{DB_NAME}"
+           f"?prepared_statement_cache_size={DB_STATEMENT_CACHE_SIZE}")
+    return create_async_engine(
+        url,
+        poolclass=TimedQueuePool,
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+
+
+def get_pool_stats(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+        "checkouts": pool.checkouts,
+        "wait_time": pool.wait_time,
+        "max_wait_time": pool.max_wait_time
+    }
+
+
+async_engine = create_engine(DB_HOST, DB_PORT)
 async_sessionfactory = async_sessionmaker(async_engine)
 
+if DB_REPLICA_HOST:
+    async_read_engine = create_engine(DB_REPLICA_HOST, DB_REPLICA_PORT)
+else:
+    async_read_engine = async_engine
+# the cache is not filled from replica sessions, see primary_session
+async_read_sessionfactory = async_sessionmaker(async_read_engine,
+                                               info={"replica": async_read_engine is not async_engine})
+
 
 async def get_async_session():
     async with async_sessionfactory() as session:
         yield session
 
 
+async def get_async_read_session():
+    async with async_read_sessionfactory() as session:
+        yield session
+
+
+@asynccontextmanager
+async def primary_session(session):
+    # rows that go into the cache are read on the primary: a replica can still be behind the
+    # invalidation that follows a commit and would put the old rows back until they expire
+    if not session.info.get("replica"):
+        yield session
+        return
+    async with async_sessionfactory() as primary:
+        yield primary
+
+
 str_256 = Annotated[str, 256]
 str_32 = Annotated[str, 32]
 
@@ -0,0 +1,86 @@
+import asyncio
+import re
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+
+from src.cache import TTLCache
+from src.config import (EMAIL_CHECK_DNS, EMAIL_DNS_TIMEOUT, EMAIL_DOMAIN_CACHE_SIZE, EMAIL_DOMAIN_CACHE_TTL,
+                        EMAIL_DOMAIN_NEGATIVE_TTL)
+
+
+EMAIL_REGEX = re.compile(
+    r"^[A-Za-z0-9.!#$%&'*+/=?^_`{|}~-]{1,64}"
+    r"@((?:[A-Za-z0-9](?:[A-Za-z0-9-]{0,61}[A-Za-z0-9])?\.)+[A-Za-z]{2,63})$"
+)
+
+
+async def resolve_mail_domain(domain: str, timeout: float = EMAIL_DNS_TIMEOUT) -> bool | None:
+    try:
+        answer = await dns.asyncresolver.resolve(domain, "MX", lifetime=timeout)
+        return len(answer) > 0
+    except dns.resolver.NoAnswer:
+        pass
+    except (dns.resolver.NXDOMAIN, dns.resolver.NoNameservers):
+        return False
+    except dns.exception.Timeout:
+        return None
+    # without MX records mail goes to the domain itself (RFC 5321, section 5.1)
+    try:
+        answer = await dns.asyncresolver.resolve(domain, "A", lifetime=timeout)
+        return len(answer) > 0
+    except (dns.resolver.NoAnswer, dns.resolver.NXDOMAIN, dns.resolver.NoNameservers):
+        return False
+    except dns.exception.Timeout:
+        return None
+
+
+class EmailValidator:
+    def __init__(self, resolver=resolve_mail_domain, check_dns: bool = True, cache_size: int = 10000,
+                 ttl: float = 3600, negative_ttl: float = 300):
+        self.resolver = resolver
+        self.check_dns = check_dns
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache = TTLCache(maxsize=cache_size, ttl=ttl)
+        self.pending: dict[str, asyncio.Future] = dict()
+
+    def get_domain(self, email: str) -> str | None:
+        match = EMAIL_REGEX.match(email)
+        if match is None:
+            return None
+        return match.group(1).lower()
+
+    async def __resolve(self, domain: str) -> bool | None:
+        # concurrent sign-ups for the same domain share one lookup
+        future = self.pending.get(domain)
+        if future is None:
+            future = asyncio.ensure_future(self.resolver(domain))
+            self.pending[domain] = future
+            future.add_done_callback(lambda _: self.pending.pop(domain, None))
+        return await asyncio.shield(future)
+
+    async def validate(self, email: str) -> bool:
+        domain = self.get_domain(email)
+        if domain is None:
+            return False
+        if not self.check_dns:
+            return True
+        result = self.cache.get(domain)
+        if result is not None:
+            return result
+        result = await self.__resolve(domain)
+        if result is None:
+            # the resolver gave no answer in time, let the address through uncached
+            return True
+        self.cache.set(domain, result, ttl=self.ttl if result else self.negative_ttl)
+        return result
+
+
+email_validator = EmailValidator(
+    check_dns=EMAIL_CHECK_DNS,
+    cache_size=EMAIL_DOMAIN_CACHE_SIZE,
+    ttl=EMAIL_DOMAIN_CACHE_TTL,
+    negative_ttl=EMAIL_DOMAIN_NEGATIVE_TTL
+)
\ No newline at end of file
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+
+import orjson
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config import (DB_USER, DB_PASS, DB_HOST, DB_PORT, DB_NAME, EVENTS_QUEUE_SIZE,
+                        EVENTS_HEALTH_CHECK_INTERVAL, EVENTS_RECONNECT_BACKOFF)
+
+
+logger = logging.getLogger(__name__)
+
+
+EVENTS_CHANNEL = "changes"
+# NOTIFY payloads must be shorter than 8000 bytes
+MAX_PAYLOAD_SIZE = 7900
+
+# sentinels a subscriber finds in its queue instead of an event
+EVICTED = object()
+RESYNC = object()
+CLOSED = object()
+
+
+async def publish(session: AsyncSession, user_id: int, type: str, op: str, ids: list | None):
+    payload = {"user_id": user_id, "type": type, "op": op, "ids": ids}
+    data = orjson.dumps(payload)
+    if len(data) > MAX_PAYLOAD_SIZE:
+        # too many to list, the client falls back to a sync
+        payload["ids"] = None
+        data = orjson.dumps(payload)
+    # Postgres delivers it on commit only, a rolled back change never reaches the clients
+    await session.execute(select(func.pg_notify(EVENTS_CHANNEL, data.decode())))
+
+
+class Subscriber:
+    def __init__(self, user_id: int, queue_size: int):
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    def push(self, event) -> bool:
+        try:
+            self.queue.put_nowait(event)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self, reason):
+        # drop what is buffered so an evicted client frees its memory right away
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(reason)
+
+
+class EventBroker:
+    def __init__(self, dsn: str, queue_size: int, health_check_interval: float, reconnect_backoff: float,
+                 max_reconnect_backoff: float = 30):
+        self.dsn = dsn
+        self.queue_size = queue_size
+        self.health_check_interval = health_check_interval
+        self.reconnect_backoff = reconnect_backoff
+        self.max_reconnect_backoff = max_reconnect_backoff
+        self.subscribers: dict[int, set[Subscriber]] = dict()
+        self.task: asyncio.Task | None = None
+        self.connected = False
+        self.delivered = 0
+        self.evicted = 0
+
+    def subscribe(self, user_id: int) -> Subscriber:
+        # one LISTEN connection per process, opened by the first subscriber
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.__listen())
+        subscriber = Subscriber(user_id, self.queue_size)
+        self.subscribers.setdefault(user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscribers = self.subscribers.get(subscriber.user_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self.subscribers[subscriber.user_id]
+
+    def subscribers_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self.subscribers.values())
+
+    def __evict(self, subscriber: Subscriber):
+        self.unsubscribe(subscriber)
+        subscriber.close(EVICTED)
+        self.evicted += 1
+
+    def __on_notification(self, connection, pid: int, channel: str, payload: str):
+        try:
+            user_id = orjson.loads(payload)["user_id"]
+        except (orjson.JSONDecodeError, KeyError, TypeError):
+            logger.warning("Ignoring malformed change event %r", payload)
+            return
+        event = payload.encode()
+        for subscriber in list(self.subscribers.get(user_id, ())):
+            if subscriber.push(event):
+                self.delivered += 1
+            else:
+                self.__evict(subscriber)
+
+    def __broadcast(self, event):
+        for subscribers in list(self.subscribers.values()):
+            for subscriber in list(subscribers):
+                if not subscriber.push(event):
+                    self.__evict(subscriber)
+
+    async def __listen(self):
+        import asyncpg
+
+        # any failure only ends this connection, the loop keeps the process listening
+        attempt = 0
+        reconnected = False
+        while True:
+            try:
+                connection = await asyncpg.connect(self.dsn)
+            except Exception as error:
+                delay = min(self.max_reconnect_backoff, self.reconnect_backoff * 2 ** attempt)
+                logger.warning("Event listener could not connect (%s), retrying in %.1f s", error, delay)
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            attempt = 0
+            lost = asyncio.Event()
+            connection.add_termination_listener(lambda _: lost.set())
+            try:
+                await connection.add_listener(EVENTS_CHANNEL, self.__on_notification)
+                self.connected = True
+                if reconnected:
+                    # whatever was published while disconnected is gone, clients have to sync
+                    self.__broadcast(RESYNC)
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), self.health_check_interval)
+                    except asyncio.TimeoutError:
+                        # an idle socket can die silently, a round trip notices it
+                        await connection.fetchval("SELECT 1", timeout=self.health_check_interval)
+            except Exception:
+                logger.warning("Event listener connection lost, reconnecting", exc_info=True)
+            finally:
+                self.connected = False
+                if not connection.is_closed():
+                    connection.terminate()
+            reconnected = True
+
+    async def stop(self):
+        for subscribers in list(self.subscribers.values()):
+            for subscriber in subscribers:
+                subscriber.close(CLOSED)
+        self.subscribers.clear()
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+
+event_broker = EventBroker(
+    f"postgresql://{DB_USER}:{DB_PASS}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+    queue_size=EVENTS_QUEUE_SIZE,
+    health_check_interval=EVENTS_HEALTH_CHECK_INTERVAL,
+    reconnect_backoff=EVENTS_RECONNECT_BACKOFF
+)
@@ -1,19 +1,74 @@
+import asyncio
+import base64
 import hashlib
-from src.config import PASS_SALT
+import hmac
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import PASS_SALT, HASH_SCRYPT_N, HASH_SCRYPT_R, HASH_SCRYPT_P, HASH_WORKERS
+
+
+def b64encode(data: bytes)->str:
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def b64decode(data: str)->bytes:
+    return base64.b64decode(data + "=" * (-len(data) % 4))
 
 
 class Hasher:
-    salt = PASS_SALT
-    def hash_str(self, string: str)->str:
+    algorithm = "scrypt"
+    salt_size = 16
+    key_size = 32
+
+    def __init__(self, n: int, r: int, p: int, workers: int, legacy_salt: str | None = None):
+        self.n = n
+        self.r = r
+        self.p = p
+        self.legacy_salt = legacy_salt
+        # the pool size is the number of KDF computations allowed to run at once
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hasher")
+
+    def __kdf(self, string: str, salt: bytes, n: int, r: int, p: int)->bytes:
+        return hashlib.scrypt(string.encode(), salt=salt, n=n, r=r, p=p,
+                              maxmem=256 * n * r, dklen=self.key_size)
+
+    def __legacy_hash(self, string: str)->str:
         sha256_hash = hashlib.new("sha256")
-        string += self.salt
-        b_string = string.encode()
-        sha256_hash.update(b_string)
-        sha256_hex = sha256_hash.hexdigest()
-        return sha256_hex
+        sha256_hash.update((string + (self.legacy_salt or "")).encode())
+        return sha256_hash.hexdigest()
+
+    def __hash_sync(self, string: str)->str:
+        salt = os.urandom(self.salt_size)
+        key = self.__kdf(string, salt, self.n, self.r, self.p)
+        return f"{self.algorithm}${self.n}${self.r}${self.p}${b64encode(salt)}${b64encode(key)}"
+
+    def __check_sync(self, hash_string: str, string: str)->bool:
+        parts = hash_string.split("$")
+        if len(parts) != 6 or parts[0] != self.algorithm:
+            return hmac.compare_digest(hash_string, self.__legacy_hash(string))
+        _, n, r, p, salt, key = parts
+        new_key = self.__kdf(string, b64decode(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(b64decode(key), new_key)
+
+    async def __run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, func, *args)
+
+    async def hash_str(self, string: str)->str:
+        return await self.__run(self.__hash_sync, string)
+
+    async def check_str(self, hash_string: str, string: str)->bool:
+        return await self.__run(self.__check_sync, hash_string, string)
+
+    def needs_rehash(self, hash_string: str)->bool:
+        parts = hash_string.split("$")
+        if len(parts) != 6 or parts[0] != self.algorithm:
+            return True
+        return parts[1:4] != [str(self.n), str(self.r), str(self.p)]
 
-    def check_str(self, hash_string: str, string: str)->bool:
-        return hash_string == self.hash_str(string)
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
 
-hasher = Hasher()
\ No newline at end of file
+hasher = Hasher(HASH_SCRYPT_N, HASH_SCRYPT_R, HASH_SCRYPT_P, HASH_WORKERS, legacy_salt=PASS_SALT)
\ No newline at end of file
@@ -1,7 +1,21 @@
-from smtplib import SMTP
+import asyncio
+import logging
+from smtplib import SMTP, SMTPException, SMTPServerDisconnected, SMTPRecipientsRefused
 from email.message import EmailMessage
 
-from src.config import SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS
+from fastapi.exceptions import HTTPException
+
+from src.config import (SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS, SMTP_STARTTLS, SMTP_TIMEOUT,
+                        MAIL_POOL_SIZE, MAIL_BATCH_SIZE, MAIL_QUEUE_SIZE, MAIL_MAX_RETRIES,
+                        MAIL_RETRY_BACKOFF)
+
+
+logger = logging.getLogger(__name__)
+
+
+class MailQueueIsFull(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=503, detail="Mail service is busy, try again later")
 
 
 def get_email_template_dashboard(recipient_email: str, recipient_name: str, link_token: str)->EmailMessage:
@@ -25,12 +39,154 @@ def get_email_template_dashboard(recipient_email: str, recipient_name: str, link
     return email
 
 
-def send_email_confirmation(recipient_email: str, recipient_name: str, link_token: str):
-    print("here")
-    email = get_email_template_dashboard(recipient_email, recipient_name, link_token)
+class SMTPConnection:
+    def __init__(self, host: str, port: int, user: str | None, password: str | None,
+                 starttls: bool = True, timeout: float = 10):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.smtp: SMTP | None = None
+
+    def connect(self):
+        self.close()
+        smtp = SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            smtp.starttls()
+        if self.user:
+            smtp.login(self.user, self.password)
+        self.smtp = smtp
+
+    def close(self):
+        if self.smtp is None:
+            return
+        try:
+            self.smtp.quit()
+        except (SMTPException, OSError):
+            pass
+        self.smtp = None
+
+    def send(self, message: EmailMessage):
+        if self.smtp is None:
+            self.connect()
+        try:
+            self.smtp.send_message(message)
+        except SMTPServerDisconnected:
+            # the server dropped the idle connection, reconnect once and resend
+            self.connect()
+            self.smtp.send_message(message)
+
+    def send_batch(self, messages: list[EmailMessage]) -> list[int]:
+        failed = []
+        for index, message in enumerate(messages):
+            try:
+                self.send(message)
+            except SMTPRecipientsRefused:
+                logger.error("Recipients refused for message to %s, dropping", message["To"])
+            except (SMTPException, OSError):
+                logger.exception("Failed to send message to %s", message["To"])
+                self.close()
+                failed.append(index)
+        return failed
+
+
+class MailSender:
+    def __init__(self, connection_factory, pool_size: int, batch_size: int, queue_size: int,
+                 max_retries: int, retry_backoff: float):
+        self.connection_factory = connection_factory
+        self.pool_size = pool_size
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.queue: asyncio.Queue | None = None
+        self.workers: list[asyncio.Task] = []
+        self.stopped = False
 
-    with SMTP(SMTP_HOST, SMTP_PORT) as smtp_server:
-        smtp_server.starttls()
-        smtp_server.login(SMTP_USER, SMTP_PASS)
-        smtp_server.send_message(email)
+    def start(self):
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self.workers = [asyncio.create_task(self.__worker(self.connection_factory()))
+                        for _ in range(self.pool_size)]
 
+    async def stop(self, timeout: float = 10):
+        self.stopped = True
+        if self.queue is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.error("Mail queue was not drained, %s messages dropped", self.queue.qsize())
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        self.queue = None
+
+    def enqueue(self, message: EmailMessage, attempt: int = 0):
+        if self.stopped:
+            raise RuntimeError("Mail sender is stopped")
+        if self.queue is None:
+            # workers are started by the first message
+            self.start()
+        try:
+            self.queue.put_nowait((message, attempt))
+        except asyncio.QueueFull:
+            raise MailQueueIsFull
+
+    def __retry(self, message: EmailMessage, attempt: int):
+        if attempt >= self.max_retries:
+            logger.error("Giving up on message to %s after %s attempts", message["To"], attempt + 1)
+            return
+        delay = self.retry_backoff * 2 ** attempt
+        asyncio.get_running_loop().call_later(delay, self.__requeue, message, attempt + 1)
+
+    def __requeue(self, message: EmailMessage, attempt: int):
+        try:
+            self.enqueue(message, attempt)
+        except (MailQueueIsFull, RuntimeError):
+            logger.error("Mail queue is unavailable, dropping retry of message to %s", message["To"])
+
+    async def __next_batch(self) -> list[tuple[EmailMessage, int]]:
+        batch = [await self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        return batch
+
+    async def __worker(self, connection: SMTPConnection):
+        try:
+            while True:
+                batch = await self.__next_batch()
+                try:
+                    failed = await asyncio.to_thread(connection.send_batch, [message for message, _ in batch])
+                    for index in failed:
+                        self.__retry(*batch[index])
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+        finally:
+            await asyncio.to_thread(connection.close)
+
+
+def create_smtp_connection() -> SMTPConnection:
+    return SMTPConnection(SMTP_HOST, SMTP_PORT, SMTP_USER, SMTP_PASS,
+                          starttls=SMTP_STARTTLS, timeout=SMTP_TIMEOUT)
+
+
+mail_sender = MailSender(
+    create_smtp_connection,
+    pool_size=MAIL_POOL_SIZE,
+    batch_size=MAIL_BATCH_SIZE,
+    queue_size=MAIL_QUEUE_SIZE,
+    max_retries=MAIL_MAX_RETRIES,
+    retry_backoff=MAIL_RETRY_BACKOFF
+)
+
+
+def send_email_confirmation(recipient_email: str, recipient_name: str, link_token: str):
+    email = get_email_template_dashboard(recipient_email, recipient_name, link_token)
+    mail_sender.enqueue(email)
@@ -1,10 +1,42 @@
+import sys
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 from src.routers.routers import all_routers
+from src.hasher import hasher
+from src.database import async_engine, async_read_engine
+from src.maintenance import reaper, rebalancer
+from src.events import event_broker
+from src.config import REAPER_ENABLED
+from src.metrics import MetricsMiddleware, install_query_hooks
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if REAPER_ENABLED:
+        reaper.start()
+    yield
+    await reaper.stop()
+    await rebalancer.stop()
+    await event_broker.stop()
+    # mail is imported by the first sign-up, there is nothing to drain otherwise
+    if "src.mail" in sys.modules:
+        await sys.modules["src.mail"].mail_sender.stop()
+    hasher.shutdown()
+    await async_engine.dispose()
+    if async_read_engine is not async_engine:
+        await async_read_engine.dispose()
+
+
+app = FastAPI(title="toDo", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
-app = FastAPI(title="toDo")
+install_query_hooks(async_engine)
+if async_read_engine is not async_engine:
+    install_query_hooks(async_read_engine)
 
 
 origins = [
@@ -19,7 +51,9 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 for router in all_routers:
@@ -0,0 +1,136 @@
+import asyncio
+import datetime
+import logging
+
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import async_sessionfactory
+from src.repository.sessions import SessionsRepository
+from src.repository.users import UsersRepository
+from src.repository.sync import SyncRepository
+from src.events import publish
+from src.config import REAPER_INTERVAL, REAPER_BATCH_SIZE, REAPER_UNVERIFIED_TTL, SYNC_TOMBSTONE_TTL
+
+
+logger = logging.getLogger(__name__)
+
+
+class Reaper:
+    def __init__(self, sessionfactory: async_sessionmaker, sessions_repo: SessionsRepository,
+                 users_repo: UsersRepository, sync_repo: SyncRepository, interval: datetime.timedelta,
+                 batch_size: int, unverified_ttl: datetime.timedelta, tombstone_ttl: datetime.timedelta):
+        self.sessionfactory = sessionfactory
+        self.sessions_repo = sessions_repo
+        self.users_repo = users_repo
+        self.sync_repo = sync_repo
+        self.interval = interval
+        self.batch_size = batch_size
+        self.unverified_ttl = unverified_ttl
+        self.tombstone_ttl = tombstone_ttl
+        self.task: asyncio.Task | None = None
+        self.last_result: dict | None = None
+
+    async def __reap(self, delete_batch) -> int:
+        total = 0
+        while True:
+            # one short transaction per batch so locks are never held for long
+            async with self.sessionfactory() as session:
+                deleted = await delete_batch(session)
+                await session.commit()
+            total += deleted
+            if deleted < self.batch_size:
+                return total
+
+    async def run_once(self) -> dict:
+        now = datetime.datetime.utcnow()
+        sessions = await self.__reap(
+            lambda session: self.sessions_repo.delete_expired(session, now, self.batch_size))
+        users = await self.__reap(
+            lambda session: self.users_repo.delete_unverified(session, now - self.unverified_ttl, now,
+                                                              self.batch_size))
+        tombstones = await self.__reap(
+            lambda session: self.sync_repo.purge_tombstones(session, now - self.tombstone_ttl, self.batch_size))
+        self.last_result = {
+            "finished_at": datetime.datetime.utcnow(),
+            "sessions": sessions,
+            "users": users,
+            "tombstones": tombstones
+        }
+        logger.info("Reaper removed %s expired sessions, %s unverified users and %s tombstones",
+                    sessions, users, tombstones)
+        return self.last_result
+
+    async def run(self):
+        while True:
+            try:
+                await self.run_once()
+            except Exception:
+                logger.exception("Reaper pass failed")
+            await asyncio.sleep(self.interval.total_seconds())
+
+    def start(self):
+        self.task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+
+class Rebalancer:
+    def __init__(self, sessionfactory: async_sessionmaker):
+        self.sessionfactory = sessionfactory
+        self.pending: set[tuple[str, int]] = set()
+        self.tasks: set[asyncio.Task] = set()
+        self.rebalanced = 0
+
+    def schedule(self, repo, type: str, user_id: int):
+        # moves that run out of room while a renumbering is pending are covered by it
+        key = (type, user_id)
+        if key in self.pending:
+            return
+        self.pending.add(key)
+        task = asyncio.create_task(self.__rebalance(repo, type, user_id))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def __rebalance(self, repo, type: str, user_id: int):
+        try:
+            async with self.sessionfactory() as session:
+                updated = await repo.rebalance(session, user_id)
+                if updated:
+                    # every rank of the list may have changed, clients sync rather than get the ids
+                    await publish(session, user_id, type, "update", None)
+                await session.commit()
+            self.rebalanced += 1
+        except Exception:
+            logger.exception("Rebalancing %s ranks of user %s failed", type, user_id)
+        finally:
+            self.pending.discard((type, user_id))
+
+    async def stop(self):
+        for task in list(self.tasks):
+            task.cancel()
+        await asyncio.gather(*self.tasks, return_exceptions=True)
+        self.tasks.clear()
+        self.pending.clear()
+
+
+reaper = Reaper(
+    async_sessionfactory,
+    SessionsRepository(),
+    UsersRepository(),
+    SyncRepository(),
+    interval=REAPER_INTERVAL,
+    batch_size=REAPER_BATCH_SIZE,
+    unverified_ttl=REAPER_UNVERIFIED_TTL,
+    tombstone_ttl=SYNC_TOMBSTONE_TTL
+)
+
+
+rebalancer = Rebalancer(async_sessionfactory)
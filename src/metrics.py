@@ -0,0 +1,150 @@
+import logging
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.config import SLOW_REQUEST_MS
+
+
+logger = logging.getLogger(__name__)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest_time = 0.0
+        self.slowest_statement: str | None = None
+
+    def record(self, statement: str, elapsed: float):
+        self.queries += 1
+        self.db_time += elapsed
+        if elapsed > self.slowest_time:
+            self.slowest_time = elapsed
+            self.slowest_statement = statement
+
+
+request_stats: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def install_query_hooks(engine: AsyncEngine):
+    # the start time lives on the execution context, which is dropped with the statement
+    # whether it succeeds or fails, so nothing is left behind on the pooled connection
+    def record(context, statement: str):
+        start = getattr(context, "query_start", None)
+        if start is None:
+            return
+        context.query_start = None
+        stats = request_stats.get()
+        if stats is not None:
+            stats.record(statement, time.perf_counter() - start)
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.query_start = time.perf_counter()
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        record(context, statement)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # a failed statement took database time too
+        record(exception_context.execution_context, exception_context.statement)
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.duration = 0.0
+        self.queries = 0
+        self.db_time = 0.0
+
+
+class Metrics:
+    def __init__(self):
+        self.routes: defaultdict[tuple[str, str, int], RouteMetrics] = defaultdict(RouteMetrics)
+        self.slow_requests = 0
+        self.rate_limited: defaultdict[str, int] = defaultdict(int)
+
+    def observe(self, method: str, route: str, status: int, duration: float, stats: RequestStats):
+        metrics = self.routes[(method, route, status)]
+        metrics.requests += 1
+        metrics.duration += duration
+        metrics.queries += stats.queries
+        metrics.db_time += stats.db_time
+
+    def render(self, gauges: dict[str, dict[tuple, float]] | None = None) -> str:
+        lines = []
+        counters = {
+            "http_requests_total": lambda metrics: metrics.requests,
+            "http_request_duration_seconds_total": lambda metrics: metrics.duration,
+            "db_queries_total": lambda metrics: metrics.queries,
+            "db_query_duration_seconds_total": lambda metrics: metrics.db_time,
+        }
+        for name, get_value in counters.items():
+            lines.append(f"# TYPE {name} counter")
+            for (method, route, status), metrics in self.routes.items():
+                lines.append(f'{name}{{method="{method}",route="{route}",status="{status}"}} {get_value(metrics)}')
+        lines.append("# TYPE http_slow_requests_total counter")
+        lines.append(f"http_slow_requests_total {self.slow_requests}")
+        lines.append("# TYPE rate_limit_rejections_total counter")
+        for name, rejected in self.rate_limited.items():
+            lines.append(f'rate_limit_rejections_total{{limit="{name}"}} {rejected}')
+        for name, samples in (gauges or {}).items():
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples.items():
+                label = ",".join(f'{key}="{label_value}"' for key, label_value in labels)
+                lines.append(f"{name}{{{label}}} {value}" if label else f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    def __init__(self, app, slow_request_ms: float = SLOW_REQUEST_MS):
+        self.app = app
+        self.slow_request_ms = slow_request_ms
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = request_stats.set(stats)
+        start = time.perf_counter()
+        status = 500
+        # the timer stops once the response starts: a streamed body (SSE, exports) can stay open
+        # for as long as the client reads it, that is not time spent handling the request
+        response_start = None
+
+        async def send_with_timing(message):
+            nonlocal status, response_start
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                response_start = time.perf_counter()
+                duration = (response_start - start) * 1000
+                server_timing = (f'db;dur={stats.db_time * 1000:.2f};desc="{stats.queries} queries", '
+                                 f'app;dur={duration:.2f}')
+                message["headers"] = [*message.get("headers", []), (b"server-timing", server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            request_stats.reset(token)
+            duration = (response_start if response_start is not None else time.perf_counter()) - start
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            metrics.observe(scope["method"], route, status, duration, stats)
+            if duration * 1000 > self.slow_request_ms:
+                metrics.slow_requests += 1
+                logger.warning("Slow request %s %s: %.1f ms, %s queries, %.1f ms in db, slowest %.1f ms: %s",
+                               scope["method"], scope["path"], duration * 1000, stats.queries,
+                               stats.db_time * 1000, stats.slowest_time * 1000, stats.slowest_statement)
@@ -1,16 +1,30 @@
 from src.database import Base
 
-from sqlalchemy import ForeignKey
+from decimal import Decimal
+
+from sqlalchemy import ForeignKey, Index, Computed, BigInteger, Numeric, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from src.search import search_vector_expression
+
 
 class Categories(Base):
     __tablename__ = "categories"
+    __table_args__ = (
+        Index("ix_categories_user_id_id", "user_id", "id", postgresql_include=["version"]),
+        Index("ix_categories_user_id_search_vector", "user_id", "search_vector", postgresql_using="gin"),
+        Index("ix_categories_user_id_version", "user_id", "version"),
+        Index("ix_categories_user_id_rank", "user_id", "rank", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column()
     description: Mapped[str] = mapped_column()
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, Computed(search_vector_expression(), persisted=True))
+    version: Mapped[int] = mapped_column(BigInteger, server_default=text("0"), nullable=False)
+    rank: Mapped[Decimal] = mapped_column(Numeric, server_default=text("0"), nullable=False)
 
     user: Mapped["Users"] = relationship(
         back_populates="categories"
@@ -1,11 +1,14 @@
 from src.database import Base
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index, BigInteger, text
 
 
 class CategoriesTasks(Base):
     __tablename__ = "categories_tasks"
+    __table_args__ = (
+        Index("ix_categories_tasks_category_id", "category_id"),
+    )
 
     task_id: Mapped[int] = mapped_column(
         ForeignKey("tasks.id", ondelete="CASCADE"),
@@ -15,3 +18,5 @@ class CategoriesTasks(Base):
         ForeignKey("categories.id", ondelete="CASCADE"),
         primary_key=True
     )
+    # links have no user_id, the trigger takes the owner from the task
+    version: Mapped[int] = mapped_column(BigInteger, server_default=text("0"), nullable=False)
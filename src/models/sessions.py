@@ -1,13 +1,18 @@
 from src.database import Base, str_32
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 
 import datetime
 
 
 class Sessions(Base):
     __tablename__ = "sessions"
+    __table_args__ = (
+        Index("uq_sessions_token", "token", unique=True),
+        Index("ix_sessions_user_id", "user_id"),
+        Index("ix_sessions_expires_in", "expires_in"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     token: Mapped[str_32] = mapped_column()
@@ -1,16 +1,34 @@
+from decimal import Decimal
+
 from src.database import Base
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import text
+from sqlalchemy import text, ForeignKey, Index, Computed, BigInteger, Numeric
+from sqlalchemy.dialects.postgresql import TSVECTOR
+
+from src.search import search_vector_expression
 
 
 class Tasks(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        Index("ix_tasks_user_id_search_vector", "user_id", "search_vector", postgresql_using="gin"),
+        Index("ix_tasks_user_id_version", "user_id", "version"),
+        Index("ix_tasks_user_id_rank", "user_id", "rank", "id"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column()
     description: Mapped[str] = mapped_column()
     done: Mapped[bool] = mapped_column(server_default=text("false"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, Computed(search_vector_expression(), persisted=True))
+    version: Mapped[int] = mapped_column(BigInteger, server_default=text("0"), nullable=False)
+    rank: Mapped[Decimal] = mapped_column(Numeric, server_default=text("0"), nullable=False)
+
+    user: Mapped["Users"] = relationship(
+        back_populates="tasks"
+    )
 
     categories: Mapped[list["Categories"]] = relationship(
         back_populates="tasks",
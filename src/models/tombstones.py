@@ -0,0 +1,23 @@
+import datetime
+
+from src.database import Base
+
+from sqlalchemy import ForeignKey, Index, BigInteger, String, text
+from sqlalchemy.orm import Mapped, mapped_column
+
+
+class Tombstones(Base):
+    __tablename__ = "tombstones"
+    __table_args__ = (
+        Index("ix_tombstones_user_id_version", "user_id", "version"),
+        Index("ix_tombstones_created_at", "created_at"),
+    )
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    entity: Mapped[str] = mapped_column(String(16))
+    # the task id for links
+    entity_id: Mapped[int] = mapped_column()
+    category_id: Mapped[int | None] = mapped_column()
+    version: Mapped[int] = mapped_column(BigInteger)
+    created_at: Mapped[datetime.datetime] = mapped_column(server_default=text("TIMEZONE('UTC', NOW())"))
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import text
+from sqlalchemy import text, Index, BigInteger
 
 import datetime
 
@@ -8,6 +8,10 @@ from src.database import Base, str_256
 
 class Users(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        Index("uq_users_email_not_deleted", "email", unique=True, postgresql_where=text("is_deleted = false")),
+        Index("ix_users_unverified_created_at", "created_at", postgresql_where=text("is_email_verified = false")),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     email: Mapped[str_256] = mapped_column(unique=False)
@@ -16,6 +20,10 @@ class Users(Base):
     is_email_verified: Mapped[bool] = mapped_column(server_default=text("false"), nullable=False)
     created_at: Mapped[datetime.datetime] = mapped_column(server_default=text("TIMEZONE('UTC', NOW())"))
     is_deleted: Mapped[bool] = mapped_column(server_default=text("false"), nullable=False)
+    # bumped by the sync triggers for every change to the user's categories, tasks and links
+    change_seq: Mapped[int] = mapped_column(BigInteger, server_default=text("0"), nullable=False)
+    # tombstones up to this version were purged, older sync cursors have to start over
+    sync_floor: Mapped[int] = mapped_column(BigInteger, server_default=text("0"), nullable=False)
 
     sessions: Mapped[list["Sessions"]] = relationship(
         back_populates="user"
@@ -25,3 +33,7 @@ class Users(Base):
         back_populates="user"
     )
 
+    tasks: Mapped[list["Tasks"]] = relationship(
+        back_populates="user"
+    )
+
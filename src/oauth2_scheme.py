@@ -1,4 +1,6 @@
 from fastapi.security import OAuth2PasswordBearer
 
 
-oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token/")
\ No newline at end of file
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token/")
+# EventSource can't send headers, the events endpoint also takes the token from the query
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/token/", auto_error=False)
@@ -0,0 +1,118 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.exceptions import HTTPException
+
+from src.config import (RATE_LIMIT_ENABLED, RATE_LIMIT_URL, CACHE_URL, RATE_LIMIT_SIZE,
+                        RATE_LIMIT_TRUST_FORWARDED)
+from src.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
+
+
+class TooManyRequests(HTTPException):
+    def __init__(self, retry_after: float):
+        super().__init__(status_code=429, detail="Too many requests, try again later",
+                         headers={"Retry-After": str(max(1, math.ceil(retry_after)))})
+
+
+class MemoryRateLimitBackend:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * rate)
+        retry_after = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            retry_after = (cost - tokens) / rate
+        self.buckets[key] = (tokens, now)
+        self.buckets.move_to_end(key)
+        # an evicted bucket comes back full, so only the least active keys are forgiven
+        while len(self.buckets) > self.maxsize:
+            self.buckets.popitem(last=False)
+        return retry_after
+
+
+class RedisRateLimitBackend:
+    # refill and take in one round trip, atomically for every worker sharing the Redis
+    script = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+    def __init__(self, url: str):
+        from redis.asyncio import Redis
+        from redis.exceptions import RedisError
+
+        self.redis = Redis.from_url(url)
+        self.errors = RedisError
+        self.take_script = self.redis.register_script(self.script)
+
+    async def take(self, key: str, capacity: int, rate: float, cost: int = 1) -> float:
+        try:
+            retry_after = await self.take_script(keys=[f"ratelimit:{key}"], args=[capacity, rate, cost])
+        except self.errors:
+            # an unavailable limiter must not take sign-in down with it
+            logger.warning("Rate limit check of %s failed, letting the request through", key, exc_info=True)
+            return 0.0
+        return float(retry_after)
+
+
+def create_rate_limit_backend(url: str | None, maxsize: int):
+    if url:
+        return RedisRateLimitBackend(url)
+    return MemoryRateLimitBackend(maxsize)
+
+
+def client_ip(request: Request, trust_forwarded: bool = RATE_LIMIT_TRUST_FORWARDED) -> str:
+    if trust_forwarded:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+    return request.client.host if request.client is not None else "unknown"
+
+
+class RateLimiter:
+    def __init__(self, backend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+
+    async def hit(self, name: str, key: str, limit: tuple[int, float]):
+        if not self.enabled:
+            return
+        count, period = limit
+        retry_after = await self.backend.take(f"{name}:{key}", count, count / period)
+        if retry_after > 0:
+            metrics.rate_limited[name] += 1
+            raise TooManyRequests(retry_after)
+
+
+rate_limiter = RateLimiter(
+    create_rate_limit_backend(RATE_LIMIT_URL or CACHE_URL, RATE_LIMIT_SIZE),
+    enabled=RATE_LIMIT_ENABLED
+)
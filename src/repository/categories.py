@@ -1,49 +1,174 @@
-from sqlalchemy import update, delete, select, insert
+import orjson
+from sqlalchemy import update, delete, select, insert, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.models.categories import Categories
-from src.schemas.categories import CategorySchema
+from src.cache import cache as shared_cache, fill, invalidate
+from src.database import primary_session
+from src.config import RANK_MAX_SCALE
+from src.schemas.categories import CategoryReturnSchema
+from src.repository.ranks import (RANK_STEP, next_rank, last_rank, get_rank, lock_ranks, order_by_rank,
+                                  move_statement, rebalance_statement, needs_rebalance)
 
 
-def tuple_to_category(data: tuple):
-    return CategorySchema(
+def tuple_to_category(data: tuple) -> CategoryReturnSchema:
+    # rows come straight from the database, so they are not validated again
+    return CategoryReturnSchema.model_construct(
         id=data[0],
         title=data[1],
-        description=data[2],
-        user_id=data[3]
+        description=data[2]
     )
 
 
 class CategoriesRepository:
     model = Categories
+    stream_batch_size = 500
+
+    def __init__(self, cache=shared_cache, rank_max_scale: int = RANK_MAX_SCALE):
+        self.cache = cache
+        self.rank_max_scale = rank_max_scale
+
+    def cache_key(self, user_id: int) -> str:
+        return f"categories:{user_id}"
+
+    def cache_field(self, kind: str, **params) -> str:
+        return kind + ":" + orjson.dumps(sorted(params.items())).decode()
+
+    async def __get_cached(self, user_id: int | None, field: str) -> list[CategoryReturnSchema] | None:
+        if user_id is None:
+            return None
+        cached = await self.cache.get(self.cache_key(user_id), field)
+        if cached is None:
+            return None
+        return [CategoryReturnSchema.model_construct(**item) for item in orjson.loads(cached)]
+
+    async def __set_cached(self, session: AsyncSession, user_id: int | None, field: str,
+                           categories: list[CategoryReturnSchema]):
+        if user_id is None:
+            return
+        await fill(session, self.cache, self.cache_key(user_id), field,
+                   orjson.dumps([item.model_dump() for item in categories]))
+
+    async def __invalidate(self, session: AsyncSession, user_id: int | None):
+        if user_id is not None:
+            await invalidate(session, self.cache, self.cache_key(user_id))
+
+    def columns(self):
+        return self.model.id, self.model.title, self.model.description
 
     async def add_one(self, session: AsyncSession, data: dict):
-        stmt = insert(self.model).values(**data).returning(self.model.id)
+        await self.__invalidate(session, data.get("user_id"))
+        stmt = (
+            insert(self.model)
+            .values(**data, rank=next_rank(self.model, data["user_id"]))
+            .returning(self.model.id)
+        )
         res = await session.execute(stmt)
         id = res.scalar_one()
         return id
 
-    async def get_one(self, session: AsyncSession, **filters):
-        stmt = select(self.model).filter_by(**filters).limit(1)
+    async def add_many(self, session: AsyncSession, data: list[dict]) -> list[int]:
+        ranks = dict()
+        for user_id in {item["user_id"] for item in data}:
+            await self.__invalidate(session, user_id)
+            ranks[user_id] = await last_rank(session, self.model, user_id)
+        data = [{**item, "rank": ranks[item["user_id"]] + RANK_STEP * (i + 1)} for i, item in enumerate(data)]
+        stmt = insert(self.model).values(data).returning(self.model.id)
         res = await session.execute(stmt)
-        res = res.scalar_one_or_none()
-        if res is None:
-            return None
-        category = CategorySchema.model_validate(res, from_attributes=True)
-        return category
+        ids = res.scalars().all()
+        return list(ids)
 
-    async def get_all(self, session: AsyncSession, **filters):
-        stmt = select(self.model).filter_by(**filters)
-        res = await session.execute(stmt)
-        res = res.scalars().all()
-        categories = [CategorySchema.model_validate(item, from_attributes=True) for item in res]
+    async def get_one(self, session: AsyncSession, **filters):
+        field = self.cache_field("one", **filters)
+        cached = await self.__get_cached(filters.get("user_id"), field)
+        if cached is not None:
+            return cached[0] if cached else None
+
+        stmt = select(*self.columns()).filter_by(**filters).limit(1)
+        async with primary_session(session) as session:
+            res = await session.execute(stmt)
+            res = res.one_or_none()
+            categories = [] if res is None else [tuple_to_category(res)]
+            await self.__set_cached(session, filters.get("user_id"), field, categories)
+        return categories[0] if categories else None
+
+    async def get_version(self, session: AsyncSession, user_id: int, id: int) -> int | None:
+        field = f"version:{id}"
+        cached = await self.cache.get(self.cache_key(user_id), field)
+        if cached is not None:
+            return orjson.loads(cached)
+
+        # covered by ix_categories_user_id_id, the row itself is not read
+        stmt = select(self.model.version).where(self.model.user_id == user_id, self.model.id == id)
+        async with primary_session(session) as session:
+            res = await session.execute(stmt)
+            version = res.scalar_one_or_none()
+            await fill(session, self.cache, self.cache_key(user_id), field, orjson.dumps(version))
+        return version
+
+    async def get_list_version(self, session: AsyncSession, user_id: int) -> tuple[int, int]:
+        field = "version:all"
+        cached = await self.cache.get(self.cache_key(user_id), field)
+        if cached is not None:
+            return tuple(orjson.loads(cached))
+
+        # every write raises the highest version except a delete, which lowers the count
+        stmt = select(func.coalesce(func.max(self.model.version), 0), func.count()).where(self.model.user_id == user_id)
+        async with primary_session(session) as session:
+            res = await session.execute(stmt)
+            version = tuple(res.one())
+            await fill(session, self.cache, self.cache_key(user_id), field, orjson.dumps(version))
+        return version
+
+    async def get_all(self, session: AsyncSession, after: int | None = None, limit: int | None = None,
+                      order: str = "id", **filters):
+        field = self.cache_field("all", after=after, limit=limit, order=order, **filters)
+        cached = await self.__get_cached(filters.get("user_id"), field)
+        if cached is not None:
+            return cached
+
+        async with primary_session(session) as session:
+            stmt = select(*self.columns()).filter_by(**filters)
+            if order == "rank":
+                cursor = None
+                if after is not None:
+                    # a cursor row deleted since the previous page leaves nothing to continue from
+                    rank = await get_rank(session, self.model, filters["user_id"], after)
+                    if rank is None:
+                        return None
+                    cursor = (rank, after)
+                stmt = order_by_rank(stmt, self.model, cursor)
+            else:
+                stmt = stmt.order_by(self.model.id)
+                if after is not None:
+                    stmt = stmt.where(self.model.id > after)
+            if limit is not None:
+                stmt = stmt.limit(limit)
+            res = await session.execute(stmt)
+            res = res.all()
+            categories = [tuple_to_category(item) for item in res]
+            await self.__set_cached(session, filters.get("user_id"), field, categories)
         return categories
 
+    async def stream_all(self, session: AsyncSession, after: int | None = None, **filters):
+        stmt = (
+            select(*self.columns())
+            .filter_by(**filters)
+            .order_by(self.model.id)
+            .execution_options(yield_per=self.stream_batch_size)
+        )
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        res = await session.stream(stmt)
+        async for item in res:
+            yield tuple_to_category(item)
+
     async def delete(self, session: AsyncSession, **filters):
+        await self.__invalidate(session, filters.get("user_id"))
         stmt = (
             delete(self.model)
             .filter_by(**filters)
-            .returning(self.model.id, self.model.title, self.model.description, self.model.user_id)
+            .returning(*self.columns())
         )
         res = await session.execute(stmt)
         res = res.all()
@@ -51,11 +176,12 @@ class CategoriesRepository:
         return categories
 
     async def update(self, session: AsyncSession, data: dict, **filters):
+        await self.__invalidate(session, filters.get("user_id"))
         stmt = (
             update(self.model)
             .filter_by(**filters)
             .values(**data)
-            .returning(self.model.id, self.model.title, self.model.description, self.model.user_id)
+            .returning(*self.columns())
         )
         res = await session.execute(stmt)
         res = res.one_or_none()
@@ -64,7 +190,20 @@ class CategoriesRepository:
         category = tuple_to_category(res)
         return category
 
+    async def move(self, session: AsyncSession, user_id: int, id: int, after_id: int | None = None,
+                   before_id: int | None = None) -> tuple[CategoryReturnSchema | None, bool]:
+        await self.__invalidate(session, user_id)
+        await lock_ranks(session, self.model, user_id)
+        stmt = move_statement(self.model, self.columns(), user_id, id, after_id, before_id)
+        res = await session.execute(stmt)
+        res = res.one_or_none()
+        if res is None:
+            return None, False
+        *category, rank, anchor_rank = res
+        return tuple_to_category(category), needs_rebalance(rank, anchor_rank, self.rank_max_scale)
 
-
-
-
+    async def rebalance(self, session: AsyncSession, user_id: int) -> int:
+        await self.__invalidate(session, user_id)
+        await lock_ranks(session, self.model, user_id)
+        res = await session.execute(rebalance_statement(self.model, user_id))
+        return res.rowcount
@@ -0,0 +1,95 @@
+from decimal import Decimal
+
+from sqlalchemy import select, update, func, tuple_, literal
+from sqlalchemy.orm import aliased
+
+
+# ranks are numeric, the midpoint (a + b) * 0.5 is exact and only gains one decimal place,
+# so moving an item is a single-row update and the list is renumbered only now and then
+RANK_STEP = 1
+
+
+def next_rank(model, user_id: int):
+    return (
+        select(func.coalesce(func.max(model.rank), 0) + RANK_STEP)
+        .where(model.user_id == user_id)
+        .scalar_subquery()
+    )
+
+
+async def last_rank(session, model, user_id: int) -> Decimal:
+    res = await session.execute(select(func.coalesce(func.max(model.rank), 0)).where(model.user_id == user_id))
+    return res.scalar_one()
+
+
+async def get_rank(session, model, user_id: int, id: int) -> Decimal | None:
+    res = await session.execute(select(model.rank).where(model.user_id == user_id, model.id == id))
+    return res.scalar_one_or_none()
+
+
+async def lock_ranks(session, model, user_id: int):
+    # moves and renumbering of one user's list take turns; each statement runs after the lock
+    # is granted, so its snapshot already has the ranks the previous holder committed
+    await session.execute(select(func.pg_advisory_xact_lock(func.hashtext(model.__tablename__), user_id)))
+
+
+def order_by_rank(stmt, model, after: tuple[Decimal, int] | None):
+    stmt = stmt.order_by(model.rank, model.id)
+    if after is not None:
+        stmt = stmt.where(tuple_(model.rank, model.id) > tuple_(literal(after[0]), literal(after[1])))
+    return stmt
+
+
+def move_statement(model, columns, user_id: int, id: int, after_id: int | None, before_id: int | None):
+    anchor_id = after_id if after_id is not None else before_id
+    anchor = aliased(model)
+    anchor_rank = (
+        select(anchor.rank)
+        .where(anchor.user_id == user_id, anchor.id == anchor_id)
+        .scalar_subquery()
+    )
+    other = aliased(model)
+    neighbor = select(other.rank).where(other.user_id == user_id, other.id != id)
+    if after_id is not None:
+        neighbor = (
+            neighbor.where(tuple_(other.rank, other.id) > tuple_(anchor_rank, literal(anchor_id)))
+            .order_by(other.rank, other.id)
+        )
+        fallback = anchor_rank + RANK_STEP
+    else:
+        neighbor = (
+            neighbor.where(tuple_(other.rank, other.id) < tuple_(anchor_rank, literal(anchor_id)))
+            .order_by(other.rank.desc(), other.id.desc())
+        )
+        fallback = anchor_rank - RANK_STEP
+    neighbor_rank = neighbor.limit(1).scalar_subquery()
+    new_rank = func.coalesce((anchor_rank + neighbor_rank) * literal(Decimal("0.5")), fallback)
+    return (
+        update(model)
+        .where(model.user_id == user_id, model.id == id, anchor_rank.isnot(None))
+        .values(rank=new_rank)
+        .returning(*columns, model.rank, anchor_rank)
+    )
+
+
+def rebalance_statement(model, user_id: int):
+    # consecutive steps that end at the old highest rank rounded up, so an item appended
+    # by a transaction that read the old highest rank still lands after all of them
+    position = func.row_number().over(order_by=(model.rank, model.id)) - func.count().over()
+    last = func.ceil(func.max(model.rank).over())
+    ordered = (
+        select(model.id, (last + position * RANK_STEP).label("rank"))
+        .where(model.user_id == user_id)
+        .subquery("ordered")
+    )
+    return (
+        update(model)
+        # rows already in place are left alone, they keep their version
+        .where(model.id == ordered.c.id, model.rank != ordered.c.rank)
+        .values(rank=ordered.c.rank)
+    )
+
+
+def needs_rebalance(rank: Decimal, anchor_rank: Decimal, max_scale: int) -> bool:
+    # a tie with the anchor means there is no room left between the two
+    return rank == anchor_rank or -rank.normalize().as_tuple().exponent > max_scale
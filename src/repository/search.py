@@ -0,0 +1,50 @@
+from sqlalchemy import select, func, literal, literal_column, union_all, desc, bindparam, String
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.categories import Categories
+from src.models.tasks import Tasks
+from src.schemas.search import SearchResultSchema
+from src.search import SEARCH_CONFIG
+
+
+def tuple_to_result(data: tuple) -> SearchResultSchema:
+    return SearchResultSchema.model_construct(
+        type=data[0],
+        id=data[1],
+        title=data[2],
+        description=data[3],
+        rank=data[4]
+    )
+
+
+class SearchRepository:
+    models = {
+        "category": Categories,
+        "task": Tasks
+    }
+
+    def __select(self, type: str, query, user_id: int):
+        model = self.models[type]
+        rank = func.ts_rank_cd(model.search_vector, query)
+        # user_id leads the GIN index, so only this user's entries are scanned
+        return (
+            select(literal(type).label("type"), model.id, model.title, model.description, rank.label("rank"))
+            .where(model.user_id == user_id, model.search_vector.op("@@")(query))
+        )
+
+    async def search(self, session: AsyncSession, user_id: int, tsquery: str, types: list[str],
+                     offset: int = 0, limit: int | None = None) -> list[SearchResultSchema]:
+        # a bound config would arrive as varchar, to_tsquery needs a regconfig
+        config = literal_column(f"'{SEARCH_CONFIG}'::regconfig")
+        query = func.to_tsquery(config, bindparam("tsquery", tsquery, type_=String))
+        matches = union_all(*(self.__select(type, query, user_id) for type in types)).subquery("matches")
+        stmt = (
+            select(matches.c.type, matches.c.id, matches.c.title, matches.c.description, matches.c.rank)
+            .order_by(desc(matches.c.rank), matches.c.type, matches.c.id)
+            .offset(offset)
+        )
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        res = await session.execute(stmt)
+        results = [tuple_to_result(item) for item in res.all()]
+        return results
@@ -63,8 +63,56 @@ class SessionsRepository:
             return None
         return tuple_to_session(res)
 
+    async def rotate(self, session: AsyncSession, token: str, now: datetime.datetime,
+                     data: dict) -> SessionSchema | None:
+        stmt = (
+            update(self.model)
+            .values(**data)
+            .where(self.model.token == token, self.model.expires_in > now)
+            .returning(self.model.id, self.model.token, self.model.expires_in, self.model.user_id)
+        )
+        res = await session.execute(stmt)
+        res = res.one_or_none()
+        if res is None:
+            return None
+        return tuple_to_session(res)
+
+    async def delete_expired(self, session: AsyncSession, now: datetime.datetime, limit: int) -> int:
+        expired = (
+            select(self.model.id)
+            .where(self.model.expires_in <= now)
+            .limit(limit)
+        )
+        stmt = (
+            delete(self.model)
+            .where(self.model.id.in_(expired))
+            .returning(self.model.id)
+        )
+        res = await session.execute(stmt)
+        return len(res.all())
+
     async def add_one(self, session: AsyncSession, data: dict) -> int:
         stmt = insert(self.model).values(**data).returning(self.model.id)
         res = await session.execute(stmt)
         id = res.scalar_one()
-        return id
\ No newline at end of file
+        return id
+
+    async def add_one_limited(self, session: AsyncSession, data: dict, limit: int) -> int:
+        new_session = insert(self.model).values(**data).returning(self.model.id).cte("new_session")
+        # every CTE sees the table as it was before the insert, so keep limit - 1 old sessions
+        overflow_ids = (
+            select(self.model.id)
+            .where(self.model.user_id == data["user_id"])
+            .order_by(self.model.expires_in.desc())
+            .offset(limit - 1)
+        )
+        overflow = (
+            delete(self.model)
+            .where(self.model.id.in_(overflow_ids))
+            .returning(self.model.id)
+            .cte("overflow")
+        )
+        stmt = select(new_session.c.id).add_cte(overflow)
+        res = await session.execute(stmt)
+        id = res.scalar_one()
+        return id
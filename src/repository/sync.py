@@ -0,0 +1,109 @@
+import datetime
+import heapq
+import itertools
+
+from sqlalchemy import select, delete, update, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.users import Users
+from src.models.categories import Categories
+from src.models.tasks import Tasks
+from src.models.categories_tasks import CategoriesTasks
+from src.models.tombstones import Tombstones
+
+
+def category_change(data: tuple) -> dict:
+    return {"type": "category", "op": "upsert", "version": data[0],
+            "data": {"id": data[1], "title": data[2], "description": data[3], "rank": str(data[4])}}
+
+
+def task_change(data: tuple) -> dict:
+    return {"type": "task", "op": "upsert", "version": data[0],
+            "data": {"id": data[1], "title": data[2], "description": data[3], "done": data[4],
+                     "rank": str(data[5])}}
+
+
+def link_change(data: tuple) -> dict:
+    return {"type": "link", "op": "upsert", "version": data[0],
+            "data": {"task_id": data[1], "category_id": data[2]}}
+
+
+def tombstone_change(data: tuple) -> dict:
+    entity, entity_id, category_id = data[1], data[2], data[3]
+    if entity == "link":
+        key = {"task_id": entity_id, "category_id": category_id}
+    else:
+        key = {"id": entity_id}
+    return {"type": entity, "op": "delete", "version": data[0], "data": key}
+
+
+class SyncRepository:
+    async def begin_snapshot(self, session: AsyncSession):
+        # the streams are read by separate selects, under READ COMMITTED a commit landing between
+        # two of them shows a later version while an earlier one is missing and the cursor skips it
+        await session.connection(execution_options={"isolation_level": "REPEATABLE READ",
+                                                    "postgresql_readonly": True})
+
+    async def get_floor(self, session: AsyncSession, user_id: int) -> int | None:
+        stmt = select(Users.sync_floor).where(Users.id == user_id, Users.is_deleted == False)
+        res = await session.execute(stmt)
+        return res.scalar_one_or_none()
+
+    def __statements(self, user_id: int, since: int, limit: int, tombstones: bool):
+        statements = [
+            (select(Categories.version, Categories.id, Categories.title, Categories.description, Categories.rank)
+             .where(Categories.user_id == user_id, Categories.version > since)
+             .order_by(Categories.version), category_change),
+            (select(Tasks.version, Tasks.id, Tasks.title, Tasks.description, Tasks.done, Tasks.rank)
+             .where(Tasks.user_id == user_id, Tasks.version > since)
+             .order_by(Tasks.version), task_change),
+            (select(CategoriesTasks.version, CategoriesTasks.task_id, CategoriesTasks.category_id)
+             .join(Tasks, Tasks.id == CategoriesTasks.task_id)
+             .where(Tasks.user_id == user_id, CategoriesTasks.version > since)
+             .order_by(CategoriesTasks.version), link_change),
+        ]
+        if tombstones:
+            statements.append(
+                (select(Tombstones.version, Tombstones.entity, Tombstones.entity_id, Tombstones.category_id)
+                 .where(Tombstones.user_id == user_id, Tombstones.version > since)
+                 .order_by(Tombstones.version), tombstone_change))
+        return [(stmt.limit(limit), to_change) for stmt, to_change in statements]
+
+    async def get_changes(self, session: AsyncSession, user_id: int, since: int, limit: int) -> list[dict]:
+        # a client syncing from scratch has nothing that could have been deleted
+        streams = []
+        for stmt, to_change in self.__statements(user_id, since, limit, tombstones=since > 0):
+            res = await session.execute(stmt)
+            streams.append([to_change(item) for item in res.all()])
+        # versions are unique per user, merging the sorted pages keeps them in order
+        merged = heapq.merge(*streams, key=lambda change: change["version"])
+        return list(itertools.islice(merged, limit))
+
+    async def purge_tombstones(self, session: AsyncSession, created_before: datetime.datetime, limit: int) -> int:
+        stale = (
+            select(Tombstones.id)
+            .where(Tombstones.created_at < created_before)
+            .order_by(Tombstones.id)
+            .limit(limit)
+        )
+        purged = (
+            delete(Tombstones)
+            .where(Tombstones.id.in_(stale))
+            .returning(Tombstones.user_id, Tombstones.version)
+            .cte("purged")
+        )
+        floors = (
+            select(purged.c.user_id, func.max(purged.c.version).label("version"))
+            .group_by(purged.c.user_id)
+            .subquery("floors")
+        )
+        raise_floors = (
+            update(Users)
+            .where(Users.id == floors.c.user_id)
+            .values(sync_floor=func.greatest(Users.sync_floor, floors.c.version))
+            .returning(Users.id)
+            .cte("raise_floors")
+        )
+        stmt = select(func.count()).select_from(purged).add_cte(raise_floors)
+        res = await session.execute(stmt)
+        return res.scalar_one()
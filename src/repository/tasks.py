@@ -0,0 +1,184 @@
+from sqlalchemy import update, delete, select, insert, bindparam, any_, tuple_, func, column, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.models.tasks import Tasks
+from src.models.categories import Categories
+from src.models.categories_tasks import CategoriesTasks
+from src.schemas.tasks import TaskSchema, TaskCategoryLinkSchema
+from src.repository.ranks import (RANK_STEP, last_rank, get_rank, lock_ranks, order_by_rank, move_statement,
+                                  rebalance_statement, needs_rebalance)
+from src.config import RANK_MAX_SCALE
+
+
+def tuple_to_task(data: tuple) -> TaskSchema:
+    # rows come straight from the database, so they are not validated again
+    return TaskSchema.model_construct(
+        id=data[0],
+        title=data[1],
+        description=data[2],
+        done=data[3],
+        user_id=data[4]
+    )
+
+
+def tuple_to_link(data: tuple) -> TaskCategoryLinkSchema:
+    return TaskCategoryLinkSchema.model_construct(
+        task_id=data[0],
+        category_id=data[1]
+    )
+
+
+def int_array(name: str, values: list[int]):
+    # a single array parameter keeps the statement text the same for any batch size
+    return bindparam(name, values, type_=ARRAY(Integer))
+
+
+class TasksRepository:
+    model = Tasks
+    links_model = CategoriesTasks
+
+    def __init__(self, rank_max_scale: int = RANK_MAX_SCALE):
+        self.rank_max_scale = rank_max_scale
+
+    def __columns(self):
+        return self.model.id, self.model.title, self.model.description, self.model.done, self.model.user_id
+
+    def __links_pairs(self, links: list[TaskCategoryLinkSchema]):
+        return (
+            func.unnest(int_array("task_ids", [link.task_id for link in links]),
+                        int_array("category_ids", [link.category_id for link in links]))
+            .table_valued(column("task_id", Integer), column("category_id", Integer))
+            .render_derived(name="pairs")
+        )
+
+    async def add_many(self, session: AsyncSession, data: list[dict]) -> list[TaskSchema]:
+        ranks = dict()
+        for user_id in {item["user_id"] for item in data}:
+            ranks[user_id] = await last_rank(session, self.model, user_id)
+        data = [{**item, "rank": ranks[item["user_id"]] + RANK_STEP * (i + 1)} for i, item in enumerate(data)]
+        stmt = insert(self.model).values(data).returning(*self.__columns())
+        res = await session.execute(stmt)
+        tasks = [tuple_to_task(item) for item in res.all()]
+        return tasks
+
+    async def get_one(self, session: AsyncSession, **filters) -> TaskSchema | None:
+        stmt = select(*self.__columns()).filter_by(**filters).limit(1)
+        res = await session.execute(stmt)
+        res = res.one_or_none()
+        if res is None:
+            return None
+        return tuple_to_task(res)
+
+    async def get_all(self, session: AsyncSession, after: int | None = None, limit: int | None = None,
+                      category_id: int | None = None, order: str = "id", **filters) -> list[TaskSchema] | None:
+        stmt = select(*self.__columns()).filter_by(**filters)
+        if category_id is not None:
+            stmt = (
+                stmt.join(self.links_model, self.links_model.task_id == self.model.id)
+                .where(self.links_model.category_id == category_id)
+            )
+        if order == "rank":
+            cursor = None
+            if after is not None:
+                # a cursor row deleted since the previous page leaves nothing to continue from
+                rank = await get_rank(session, self.model, filters["user_id"], after)
+                if rank is None:
+                    return None
+                cursor = (rank, after)
+            stmt = order_by_rank(stmt, self.model, cursor)
+        else:
+            stmt = stmt.order_by(self.model.id)
+            if after is not None:
+                stmt = stmt.where(self.model.id > after)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        res = await session.execute(stmt)
+        tasks = [tuple_to_task(item) for item in res.all()]
+        return tasks
+
+    async def update(self, session: AsyncSession, data: dict, **filters) -> TaskSchema | None:
+        stmt = (
+            update(self.model)
+            .filter_by(**filters)
+            .values(**data)
+            .returning(*self.__columns())
+        )
+        res = await session.execute(stmt)
+        res = res.one_or_none()
+        if res is None:
+            return None
+        return tuple_to_task(res)
+
+    async def move(self, session: AsyncSession, user_id: int, id: int, after_id: int | None = None,
+                   before_id: int | None = None) -> tuple[TaskSchema | None, bool]:
+        await lock_ranks(session, self.model, user_id)
+        stmt = move_statement(self.model, self.__columns(), user_id, id, after_id, before_id)
+        res = await session.execute(stmt)
+        res = res.one_or_none()
+        if res is None:
+            return None, False
+        *task, rank, anchor_rank = res
+        return tuple_to_task(task), needs_rebalance(rank, anchor_rank, self.rank_max_scale)
+
+    async def rebalance(self, session: AsyncSession, user_id: int) -> int:
+        await lock_ranks(session, self.model, user_id)
+        res = await session.execute(rebalance_statement(self.model, user_id))
+        return res.rowcount
+
+    async def set_done(self, session: AsyncSession, user_id: int, ids: list[int], done: bool) -> list[TaskSchema]:
+        stmt = (
+            update(self.model)
+            .where(self.model.user_id == user_id, self.model.id == any_(int_array("ids", ids)))
+            .values(done=done)
+            .returning(*self.__columns())
+        )
+        res = await session.execute(stmt)
+        tasks = [tuple_to_task(item) for item in res.all()]
+        return tasks
+
+    async def delete(self, session: AsyncSession, **filters) -> list[TaskSchema]:
+        stmt = (
+            delete(self.model)
+            .filter_by(**filters)
+            .returning(*self.__columns())
+        )
+        res = await session.execute(stmt)
+        tasks = [tuple_to_task(item) for item in res.all()]
+        return tasks
+
+    async def attach_categories(self, session: AsyncSession, user_id: int,
+                                links: list[TaskCategoryLinkSchema]) -> list[TaskCategoryLinkSchema]:
+        pairs = self.__links_pairs(links)
+        owned_pairs = (
+            select(pairs.c.task_id, pairs.c.category_id)
+            .select_from(pairs)
+            .join(self.model, self.model.id == pairs.c.task_id)
+            .join(Categories, Categories.id == pairs.c.category_id)
+            .where(self.model.user_id == user_id, Categories.user_id == user_id)
+        )
+        stmt = (
+            pg_insert(self.links_model)
+            .from_select(["task_id", "category_id"], owned_pairs)
+            .on_conflict_do_nothing()
+            .returning(self.links_model.task_id, self.links_model.category_id)
+        )
+        res = await session.execute(stmt)
+        links = [tuple_to_link(item) for item in res.all()]
+        return links
+
+    async def detach_categories(self, session: AsyncSession, user_id: int,
+                                links: list[TaskCategoryLinkSchema]) -> list[TaskCategoryLinkSchema]:
+        pairs = self.__links_pairs(links)
+        stmt = (
+            delete(self.links_model)
+            .where(
+                tuple_(self.links_model.task_id, self.links_model.category_id)
+                .in_(select(pairs.c.task_id, pairs.c.category_id).select_from(pairs)),
+                self.links_model.task_id.in_(select(self.model.id).where(self.model.user_id == user_id))
+            )
+            .returning(self.links_model.task_id, self.links_model.category_id)
+        )
+        res = await session.execute(stmt)
+        links = [tuple_to_link(item) for item in res.all()]
+        return links
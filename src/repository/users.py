@@ -1,13 +1,21 @@
+import datetime
+
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import insert, update, select, delete
+from sqlalchemy import insert, update, select, delete, exists
 
 from src.models.users import Users
+from src.models.sessions import Sessions
+from src.models.categories import Categories
+from src.models.tasks import Tasks
+from src.cache import cache as shared_cache, fill, invalidate
+from src.database import primary_session
 
-from src.schemas.users import UserSchema
+from src.schemas.users import UserSchema, UserReturnSchema
 
 
-def tuple_to_user(data: tuple):
-    return UserSchema(
+def tuple_to_user(data: tuple) -> UserSchema:
+    # rows come straight from the database, so they are not validated again
+    return UserSchema.model_construct(
         id=data[0],
         email=data[1],
         name=data[2],
@@ -17,37 +25,97 @@ def tuple_to_user(data: tuple):
     )
 
 
+def tuple_to_public_user(data: tuple) -> UserReturnSchema:
+    return UserReturnSchema.model_construct(
+        id=data[0],
+        email=data[1],
+        name=data[2],
+        is_email_verified=data[3],
+        created_at=data[4]
+    )
+
+
 class UsersRepository:
     model = Users
 
+    def __init__(self, cache=shared_cache):
+        self.cache = cache
+
+    def cache_key(self, id: int) -> str:
+        return f"user:{id}"
+
+    def public_columns(self):
+        return (self.model.id, self.model.email, self.model.name,
+                self.model.is_email_verified, self.model.created_at)
+
+    def columns(self):
+        return *self.public_columns(), self.model.hash_password
+
     async def get_all(self, session: AsyncSession, **filters) -> list[UserSchema]:
         stmt = (
-            select(self.model)
+            select(*self.columns())
             .filter_by(**filters, is_deleted=False)
         )
         res = await session.execute(stmt)
-        res = res.scalars().all()
-        users = [UserSchema.model_validate(item, from_attributes=True) for item in res]
+        res = res.all()
+        users = [tuple_to_user(item) for item in res]
         return users
 
 
     async def get_one(self, session: AsyncSession, **filters) -> UserSchema | None:
         stmt = (
-            select(self.model)
-            .filter_by(**filters)
+            select(*self.columns())
+            .filter_by(**filters, is_deleted=False)
         )
         res = await session.execute(stmt)
-        res = res.scalar_one_or_none()
+        res = res.one_or_none()
 
         if res is None:
             return None
 
-        if res.is_deleted:
-            return None
+        user = tuple_to_user(res)
+        return user
 
-        user = UserSchema.model_validate(res, from_attributes=True)
+    async def get_public_json(self, session: AsyncSession, id: int) -> bytes | None:
+        cached = await self.cache.get(self.cache_key(id), "public")
+        if cached is not None:
+            return cached
+
+        stmt = (
+            select(*self.public_columns())
+            .filter_by(id=id, is_deleted=False)
+        )
+        async with primary_session(session) as session:
+            res = await session.execute(stmt)
+            res = res.one_or_none()
+
+            if res is None:
+                return None
+
+            user = tuple_to_public_user(res).model_dump_json().encode()
+            await fill(session, self.cache, self.cache_key(id), "public", user)
         return user
 
+    async def get_public(self, session: AsyncSession, id: int) -> UserReturnSchema | None:
+        user = await self.get_public_json(session, id)
+        if user is None:
+            return None
+        return UserReturnSchema.model_validate_json(user)
+
+    async def exists(self, session: AsyncSession, id: int) -> bool:
+        if await self.cache.get(self.cache_key(id), "alive") is not None:
+            return True
+        stmt = (
+            select(self.model.id)
+            .filter_by(id=id, is_deleted=False)
+        )
+        async with primary_session(session) as session:
+            res = await session.execute(stmt)
+            if res.scalar_one_or_none() is None:
+                return False
+            await fill(session, self.cache, self.cache_key(id), "alive", b"1")
+        return True
+
     async def add_one(self, session: AsyncSession, data: dict) -> int:
         stmt = insert(self.model).values(**data).returning(self.model.id)
         res = await session.execute(stmt)
@@ -55,12 +123,12 @@ class UsersRepository:
         return id
 
     async def delete_one(self, session: AsyncSession, id: int) -> UserSchema:
+        await invalidate(session, self.cache, self.cache_key(id))
         stmt = (
             update(self.model)
             .values(is_deleted=True)
             .filter_by(id=id)
-            .returning(self.model.id, self.model.email, self.model.name,
-                       self.model.is_email_verified, self.model.created_at, self.model.hash_password)
+            .returning(*self.columns())
         )
         res = await session.execute(stmt)
         res = res.one()
@@ -68,24 +136,50 @@ class UsersRepository:
         return user
 
     async def hard_delete_one(self, session: AsyncSession, id: int)->UserSchema:
+        await invalidate(session, self.cache, self.cache_key(id))
         stmt = (
             delete(self.model)
             .filter_by(id=id)
-            .returning(self.model.id, self.model.email, self.model.name,
-                       self.model.is_email_verified, self.model.created_at, self.model.hash_password)
+            .returning(*self.columns())
         )
         res = await session.execute(stmt)
         res = res.one()
         user = tuple_to_user(res)
         return user
 
+    async def delete_unverified(self, session: AsyncSession, created_before: datetime.datetime,
+                                now: datetime.datetime, limit: int) -> int:
+        # signing in does not need a verified email, an account that is still used or holds
+        # categories or tasks is kept; only abandoned sign-ups are removed
+        stale = (
+            select(self.model.id)
+            .where(
+                self.model.is_email_verified == False,
+                self.model.created_at < created_before,
+                ~exists().where(Sessions.user_id == self.model.id, Sessions.expires_in > now),
+                ~exists().where(Categories.user_id == self.model.id),
+                ~exists().where(Tasks.user_id == self.model.id)
+            )
+            .limit(limit)
+        )
+        stmt = (
+            delete(self.model)
+            .where(self.model.id.in_(stale))
+            .returning(self.model.id)
+        )
+        res = await session.execute(stmt)
+        ids = res.scalars().all()
+        if ids:
+            await invalidate(session, self.cache, *[self.cache_key(id) for id in ids])
+        return len(ids)
+
     async def update_one(self, session: AsyncSession, id: int, data: dict) -> UserSchema:
+        await invalidate(session, self.cache, self.cache_key(id))
         stmt = (
             update(self.model)
             .values(**data)
             .filter_by(id=id)
-            .returning(self.model.id, self.model.email, self.model.name,
-                       self.model.is_email_verified, self.model.created_at, self.model.hash_password)
+            .returning(*self.columns())
         )
         res = await session.execute(stmt)
         res = res.one()
@@ -1,13 +1,15 @@
-from fastapi import APIRouter, Depends, Response, Cookie
+from fastapi import APIRouter, Depends, Request, Response, Cookie
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.exceptions import HTTPException
 from pydantic import BaseModel
-from email_validate import validate
 
 from src.schemas.users import UserCreateSchema, UserAuthSchema, UserReturnSchema
 from src.routers.dependencies import get_users_service
 from src.service.users import UsersService
 from src.database import get_async_session
+from src.ratelimit import rate_limiter, client_ip
+from src.config import (RATE_LIMIT_SIGN_IN_IP, RATE_LIMIT_SIGN_IN_EMAIL, RATE_LIMIT_SIGN_UP_IP,
+                        RATE_LIMIT_SIGN_UP_EMAIL, RATE_LIMIT_REFRESH_IP)
 
 
 auth_router = APIRouter(prefix="/auth")
@@ -28,11 +30,17 @@ class SignUpResponseSchema(BaseModel):
 
 
 @auth_router.post("/sign-up", status_code=201)
-async def sign_up(response: Response,
+async def sign_up(request: Request,
+                  response: Response,
                   user: UserCreateSchema,
                   user_service: UsersService = Depends(get_users_service),
                   session: AsyncSession = Depends(get_async_session))->SignUpResponseSchema:
-    if not validate(user.email):
+    await rate_limiter.hit("sign-up:ip", client_ip(request), RATE_LIMIT_SIGN_UP_IP)
+    await rate_limiter.hit("sign-up:email", user.email.lower(), RATE_LIMIT_SIGN_UP_EMAIL)
+
+    from src.email_validation import email_validator
+
+    if not await email_validator.validate(user.email):
         raise InvalidEmail
     tokens = await user_service.create_user(session, user)
     response.set_cookie(
@@ -61,10 +69,14 @@ class SignInResponseSchema(BaseModel):
 
 
 @auth_router.post("/sign-in")
-async def sign_in(response: Response,
+async def sign_in(request: Request,
+                  response: Response,
                   user: UserAuthSchema,
                   user_service: UsersService = Depends(get_users_service),
                   session: AsyncSession = Depends(get_async_session))->SignInResponseSchema:
+    # the session is not connected until first used, so rejected attempts never reach the database
+    await rate_limiter.hit("sign-in:ip", client_ip(request), RATE_LIMIT_SIGN_IN_IP)
+    await rate_limiter.hit("sign-in:email", user.email.lower(), RATE_LIMIT_SIGN_IN_EMAIL)
     res = await user_service.auth_user(session, user)
     response.set_cookie(
         key="refresh_token",
@@ -84,10 +96,12 @@ class InvalidRefreshToken(HTTPException):
 
 
 @auth_router.post("/refresh")
-async def refresh(response: Response,
+async def refresh(request: Request,
+                  response: Response,
                   user_service: UsersService = Depends(get_users_service),
                   session: AsyncSession = Depends(get_async_session),
                   refresh_token: str | None = Cookie(default=None))->RefreshResponseSchema:
+    await rate_limiter.hit("refresh:ip", client_ip(request), RATE_LIMIT_REFRESH_IP)
     if refresh_token is None:
         raise InvalidRefreshToken
     tokens = await user_service.refresh_tokens(session, refresh_token=refresh_token)
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, Body
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from src.tokens import get_user_id_from_token
+from src.routers.dependencies import get_batch_service
+from src.service.batch import BatchService
+from src.schemas.batch import BatchSchema, BatchResultSchema
+from src.database import get_async_session
+
+
+batch_router = APIRouter(prefix="/batch")
+
+
+class BatchResponseModel(BaseModel):
+    committed: bool
+    results: list[BatchResultSchema]
+
+
+@batch_router.post("/")
+async def run_batch(data: BatchSchema = Body(),
+                    user_id: int = Depends(get_user_id_from_token),
+                    batch_service: BatchService = Depends(get_batch_service),
+                    session: AsyncSession = Depends(get_async_session))->BatchResponseModel:
+    result = await batch_service.run(session, user_id, data.operations, data.mode)
+    return ORJSONResponse(result)
@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Depends, Body
+from typing import Literal
+
+import orjson
+from fastapi import APIRouter, Depends, Body, Query, Request
 from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse, ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
@@ -7,8 +11,11 @@ from src.tokens import get_user_id_from_token
 from src.routers.dependencies import get_categories_service
 from src.service.categories import CategoriesService
 from src.schemas.categories import (CategoryCreateSchema, CategoryReturnSchema,
-                                    CategoryUpdateSchema, CategorySchema)
-from src.database import get_async_session
+                                    CategoryUpdateSchema, CategoryMoveSchema)
+from src.database import get_async_session, get_async_read_session, async_read_sessionfactory
+from src.etag import make_etag, etag_matches, etag_headers, not_modified
+from src.bulk import (NDJSON_MEDIA_TYPE, CSV_MEDIA_TYPE, parse_ndjson, parse_csv, category_to_csv,
+                      csv_header)
 
 
 categories_router = APIRouter(prefix="/categories")
@@ -18,81 +25,190 @@ class CreateCategoryResponseModel(BaseModel):
     category: CategoryReturnSchema
 
 
-@categories_router.post("/")
+@categories_router.post("/", response_model=CategoryReturnSchema)
 async def create_category(data: CategoryCreateSchema = Body(),
                           user_id: int = Depends(get_user_id_from_token),
                           categories_service: CategoriesService = Depends(get_categories_service),
                           session: AsyncSession = Depends(get_async_session)):
     category_id = await categories_service.add_category(session=session, user_id=user_id, data=data)
-    return CategoryReturnSchema.model_validate({
-        "id": category_id, **data.model_dump()}, from_attributes=True)
+    return ORJSONResponse({"id": category_id, **data.model_dump()})
 
 
 class GetCategoriesResponseModel(BaseModel):
     categories: list[CategoryReturnSchema]
+    next_cursor: int | None = None
+
+
+class UnsupportedMediaType(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=415, detail=f"Expected {NDJSON_MEDIA_TYPE} or {CSV_MEDIA_TYPE}")
+
+
+async def open_categories_stream(categories_service: CategoriesService, user_id: int,
+                                 after: int | None = None, **filters):
+    # the stream outlives the request-scoped session, so it gets its own
+    session = async_read_sessionfactory()
+    try:
+        categories = await categories_service.stream_all_category(session, user_id=user_id,
+                                                                  after=after, **filters)
+    except BaseException:
+        await session.close()
+        raise
+    return session, categories
+
+
+async def categories_to_ndjson(session: AsyncSession, categories):
+    try:
+        async for category in categories:
+            yield orjson.dumps(category.model_dump()) + b"\n"
+    finally:
+        await session.close()
+
+
+async def categories_to_csv(session: AsyncSession, categories):
+    try:
+        yield csv_header()
+        async for category in categories:
+            yield category_to_csv(category)
+    finally:
+        await session.close()
 
 
-@categories_router.get("/")
-async def get_categories(title: str | None = None,
+@categories_router.get("/", response_model=GetCategoriesResponseModel)
+async def get_categories(request: Request,
+                         title: str | None = None,
                          description: str | None = None,
+                         after: int | None = None,
+                         limit: int = Query(default=100, ge=1, le=1000),
+                         order: Literal["id", "rank"] = "id",
                          user_id: int = Depends(get_user_id_from_token),
                          categories_service: CategoriesService = Depends(get_categories_service),
-                         session: AsyncSession = Depends(get_async_session)):
+                         session: AsyncSession = Depends(get_async_read_session)):
     filters = dict()
     if not title is None: filters["title"] = title
     if not description is None: filters["description"] = description
+
+    if NDJSON_MEDIA_TYPE in request.headers.get("accept", ""):
+        stream_session, categories = await open_categories_stream(categories_service, user_id, after, **filters)
+        return StreamingResponse(categories_to_ndjson(stream_session, categories), media_type=NDJSON_MEDIA_TYPE)
+
+    # the query string is part of the cached URL, so one tag for the whole list is enough
+    etag = make_etag("categories", user_id, *await categories_service.get_categories_version(session, user_id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
+
     categories = await categories_service.get_all_category(session=session,
                                                            user_id=user_id,
+                                                           after=after,
+                                                           limit=limit + 1,
+                                                           order=order,
                                                            **filters)
-    categories = [CategoryReturnSchema.model_validate(item, from_attributes=True) for item in categories]
-    return GetCategoriesResponseModel(
-        categories=categories
-    )
+    next_cursor = None
+    if len(categories) > limit:
+        categories = categories[:limit]
+        next_cursor = categories[-1].id
+    # the rows are already response schemas, FastAPI does not need to validate them again
+    return ORJSONResponse({
+        "categories": [item.model_dump() for item in categories],
+        "next_cursor": next_cursor
+    }, headers=etag_headers(etag))
+
+
+class ImportErrorSchema(BaseModel):
+    line: int
+    error: str
+
+
+class ImportCategoriesResponseModel(BaseModel):
+    created: int
+    ids: list[int]
+    errors: list[ImportErrorSchema]
+
+
+@categories_router.post("/bulk", response_model=ImportCategoriesResponseModel)
+async def import_categories(request: Request,
+                            user_id: int = Depends(get_user_id_from_token),
+                            categories_service: CategoriesService = Depends(get_categories_service),
+                            session: AsyncSession = Depends(get_async_session)):
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type == NDJSON_MEDIA_TYPE:
+        rows = parse_ndjson(request.stream())
+    elif content_type == CSV_MEDIA_TYPE:
+        rows = parse_csv(request.stream())
+    else:
+        raise UnsupportedMediaType
+    result = await categories_service.import_categories(session, user_id, rows)
+    return ORJSONResponse(result)
+
+
+@categories_router.get("/bulk")
+async def export_categories(format: Literal["ndjson", "csv"] = "ndjson",
+                            user_id: int = Depends(get_user_id_from_token),
+                            categories_service: CategoriesService = Depends(get_categories_service)):
+    stream_session, categories = await open_categories_stream(categories_service, user_id)
+    if format == "csv":
+        return StreamingResponse(categories_to_csv(stream_session, categories), media_type=CSV_MEDIA_TYPE,
+                                 headers={"Content-Disposition": 'attachment; filename="categories.csv"'})
+    return StreamingResponse(categories_to_ndjson(stream_session, categories), media_type=NDJSON_MEDIA_TYPE,
+                             headers={"Content-Disposition": 'attachment; filename="categories.ndjson"'})
 
 
 class GetCategoryResponseModel(BaseModel):
     category: CategoryReturnSchema
 
 
-@categories_router.get("/{id}")
+@categories_router.get("/{id}", response_model=GetCategoryResponseModel)
 async def get_category(id: int,
+                       request: Request,
                        user_id: int = Depends(get_user_id_from_token),
                        categories_service: CategoriesService = Depends(get_categories_service),
-                       session: AsyncSession = Depends(get_async_session)):
+                       session: AsyncSession = Depends(get_async_read_session)):
+    etag = make_etag("category", user_id, id, await categories_service.get_category_version(session, user_id, id))
+    if etag_matches(request, etag):
+        return not_modified(etag)
     category = await categories_service.get_one_category(session, user_id, id)
-    return GetCategoryResponseModel(
-        category=CategoryReturnSchema.model_validate(category, from_attributes=True))
+    return ORJSONResponse({"category": category.model_dump()}, headers=etag_headers(etag))
 
 
 class UpdateCategoryResponseModel(BaseModel):
     category: CategoryReturnSchema
 
 
-@categories_router.put("/{id}")
+@categories_router.put("/{id}", response_model=UpdateCategoryResponseModel)
 async def update_category(id: int,
                           data: CategoryUpdateSchema = Body(),
                           user_id: int = Depends(get_user_id_from_token),
                           categories_service: CategoriesService = Depends(get_categories_service),
                           session: AsyncSession = Depends(get_async_session)):
     category = await categories_service.update_category(session, user_id, data.model_dump(), id=id)
-    return UpdateCategoryResponseModel(
-        category=CategoryReturnSchema.model_validate(category, from_attributes=True)
-    )
+    return ORJSONResponse({"category": category.model_dump()})
+
+
+class MoveCategoryResponseModel(BaseModel):
+    category: CategoryReturnSchema
+
+
+@categories_router.patch("/{id}/move", response_model=MoveCategoryResponseModel)
+async def move_category(id: int,
+                        data: CategoryMoveSchema = Body(),
+                        user_id: int = Depends(get_user_id_from_token),
+                        categories_service: CategoriesService = Depends(get_categories_service),
+                        session: AsyncSession = Depends(get_async_session)):
+    category = await categories_service.move_category(session, user_id, id, data.after_id, data.before_id)
+    return ORJSONResponse({"category": category.model_dump()})
 
 
 class DeleteCategoryResponseModel(BaseModel):
     category: CategoryReturnSchema
 
 
-@categories_router.delete("/{id}")
+@categories_router.delete("/{id}", response_model=DeleteCategoryResponseModel)
 async def delete_category(id: int,
                           user_id: int = Depends(get_user_id_from_token),
                           categories_service: CategoriesService = Depends(get_categories_service),
                           session: AsyncSession = Depends(get_async_session)):
     category = await categories_service.delete_category(session, user_id, id)
-    return DeleteCategoryResponseModel(
-        category=CategoryReturnSchema.model_validate(category, from_attributes=True)
-    )
+    return ORJSONResponse({"category": category.model_dump()})
 
 
 
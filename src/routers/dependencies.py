@@ -3,6 +3,13 @@ from src.repository.users import UsersRepository
 from src.repository.sessions import SessionsRepository
 from src.repository.categories import CategoriesRepository
 from src.service.categories import CategoriesService
+from src.repository.tasks import TasksRepository
+from src.service.tasks import TasksService
+from src.repository.search import SearchRepository
+from src.service.search import SearchService
+from src.repository.sync import SyncRepository
+from src.service.sync import SyncService
+from src.service.batch import BatchService
 
 
 def get_users_service() -> UsersService:
@@ -12,3 +19,18 @@ def get_users_service() -> UsersService:
 def get_categories_service() -> CategoriesService:
     return CategoriesService(CategoriesRepository(), UsersRepository())
 
+
+def get_tasks_service() -> TasksService:
+    return TasksService(TasksRepository(), UsersRepository())
+
+
+def get_search_service() -> SearchService:
+    return SearchService(SearchRepository(), UsersRepository())
+
+
+def get_sync_service() -> SyncService:
+    return SyncService(SyncRepository())
+
+
+def get_batch_service() -> BatchService:
+    return BatchService(CategoriesRepository(), TasksRepository(), UsersRepository())
@@ -0,0 +1,61 @@
+import asyncio
+
+from fastapi import APIRouter, Depends
+from fastapi.exceptions import HTTPException
+from fastapi.responses import StreamingResponse
+
+from src.tokens import get_user_id_from_token
+from src.oauth2_scheme import optional_oauth2_scheme
+from src.events import event_broker, Subscriber, EVICTED, RESYNC, CLOSED
+from src.config import EVENTS_PING_INTERVAL
+
+
+events_router = APIRouter(prefix="/events")
+
+
+EVENT_STREAM_MEDIA_TYPE = "text/event-stream"
+
+
+class NotAuthenticated(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=401, detail="Not authenticated", headers={"WWW-Authenticate": "Bearer"})
+
+
+async def get_user_id_from_header_or_query(token: str | None = Depends(optional_oauth2_scheme),
+                                           access_token: str | None = None):
+    if token is None:
+        token = access_token
+    if token is None:
+        raise NotAuthenticated
+    return await get_user_id_from_token(token)
+
+
+async def subscriber_to_sse(subscriber: Subscriber, ping_interval: float):
+    try:
+        yield b"retry: 5000\n\n"
+        while True:
+            try:
+                event = await asyncio.wait_for(subscriber.queue.get(), ping_interval)
+            except asyncio.TimeoutError:
+                # keeps proxies from closing an idle stream and notices clients that are gone
+                yield b": ping\n\n"
+                continue
+            if event is CLOSED:
+                return
+            if event is EVICTED:
+                yield b"event: evicted\ndata: {}\n\n"
+                return
+            if event is RESYNC:
+                yield b"event: resync\ndata: {}\n\n"
+                continue
+            yield b"event: change\ndata: " + event + b"\n\n"
+    finally:
+        event_broker.unsubscribe(subscriber)
+
+
+@events_router.get("/")
+async def get_events(user_id: int = Depends(get_user_id_from_header_or_query)):
+    subscriber = event_broker.subscribe(user_id)
+    return StreamingResponse(subscriber_to_sse(subscriber, EVENTS_PING_INTERVAL),
+                             media_type=EVENT_STREAM_MEDIA_TYPE,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
@@ -0,0 +1,50 @@
+import sys
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import PlainTextResponse
+
+from src.database import async_engine, async_read_engine, get_pool_stats
+from src.metrics import metrics
+from src.tokens import access_tokens_cache, require_internal_token
+from src.cache import cache as shared_cache
+from src.events import event_broker
+
+
+metrics_router = APIRouter(dependencies=[Depends(require_internal_token)])
+
+
+def get_gauges() -> dict[str, dict[tuple, float]]:
+    gauges = dict()
+
+    engines = {"primary": async_engine}
+    if async_read_engine is not async_engine:
+        engines["replica"] = async_read_engine
+    for engine_name, engine in engines.items():
+        for key, value in get_pool_stats(engine).items():
+            gauges.setdefault(f"db_pool_{key}", dict())[(("engine", engine_name),)] = value
+
+    caches = {
+        "access_tokens": access_tokens_cache,
+        "shared": shared_cache
+    }
+    # mail and email validation are imported on first use, until then they have nothing to report
+    email_validation = sys.modules.get("src.email_validation")
+    if email_validation is not None:
+        caches["email_domains"] = email_validation.email_validator.cache
+    for cache_name, cache in caches.items():
+        for key, value in cache.stats().items():
+            gauges.setdefault(f"cache_{key}", dict())[(("cache", cache_name),)] = value
+
+    gauges["events_subscribers"] = {(): event_broker.subscribers_count()}
+    gauges["events_delivered"] = {(): event_broker.delivered}
+    gauges["events_evicted"] = {(): event_broker.evicted}
+
+    mail = sys.modules.get("src.mail")
+    queue = mail.mail_sender.queue if mail is not None else None
+    gauges["mail_queue_size"] = {(): 0 if queue is None else queue.qsize()}
+    return gauges
+
+
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return metrics.render(get_gauges())
\ No newline at end of file
@@ -1,7 +1,15 @@
 from src.routers.auth import auth_router
 from src.routers.users import users_router
 from src.routers.categories import categories_router
+from src.routers.tasks import tasks_router
+from src.routers.stats import stats_router
+from src.routers.metrics import metrics_router
+from src.routers.search import search_router
+from src.routers.sync import sync_router
+from src.routers.events import events_router
+from src.routers.batch import batch_router
 
 
-all_routers = [auth_router, users_router, categories_router]
+all_routers = [auth_router, users_router, categories_router, tasks_router, stats_router, metrics_router,
+               search_router, sync_router, events_router, batch_router]
 
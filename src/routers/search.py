@@ -0,0 +1,39 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from src.tokens import get_user_id_from_token
+from src.routers.dependencies import get_search_service
+from src.service.search import SearchService
+from src.schemas.search import SearchResultSchema, SearchType
+from src.database import get_async_read_session
+
+
+search_router = APIRouter(prefix="/search")
+
+
+class SearchResponseModel(BaseModel):
+    results: list[SearchResultSchema]
+    next_offset: int | None = None
+
+
+@search_router.get("/")
+async def search(q: str = Query(min_length=1, max_length=200),
+                 type: list[SearchType] = Query(default=["category", "task"]),
+                 prefix: bool = True,
+                 offset: int = Query(default=0, ge=0),
+                 limit: int = Query(default=20, ge=1, le=100),
+                 user_id: int = Depends(get_user_id_from_token),
+                 search_service: SearchService = Depends(get_search_service),
+                 session: AsyncSession = Depends(get_async_read_session))->SearchResponseModel:
+    results = await search_service.search(session, user_id, q, list(dict.fromkeys(type)), prefix=prefix,
+                                          offset=offset, limit=limit + 1)
+    next_offset = None
+    if len(results) > limit:
+        results = results[:limit]
+        next_offset = offset + limit
+    return ORJSONResponse({
+        "results": [item.model_dump() for item in results],
+        "next_offset": next_offset
+    })
@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends
+
+from src.database import async_engine, async_read_engine, get_pool_stats
+from src.maintenance import reaper
+from src.tokens import require_internal_token
+
+
+stats_router = APIRouter(prefix="/stats", dependencies=[Depends(require_internal_token)])
+
+
+@stats_router.get("/pool")
+async def get_pool():
+    return {
+        "primary": get_pool_stats(async_engine),
+        "replica": None if async_read_engine is async_engine else get_pool_stats(async_read_engine)
+    }
+
+
+@stats_router.get("/reaper")
+async def get_reaper():
+    return {
+        "last_result": reaper.last_result
+    }
\ No newline at end of file
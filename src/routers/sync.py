@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from src.tokens import get_user_id_from_token
+from src.routers.dependencies import get_sync_service
+from src.service.sync import SyncService
+from src.schemas.sync import SyncChangeSchema
+from src.database import get_async_read_session
+
+
+sync_router = APIRouter(prefix="/sync")
+
+
+class SyncResponseModel(BaseModel):
+    changes: list[SyncChangeSchema]
+    cursor: int
+    has_more: bool
+    reset: bool
+
+
+@sync_router.get("/")
+async def get_changes(since: int = Query(default=0, ge=0),
+                      limit: int = Query(default=500, ge=1, le=1000),
+                      user_id: int = Depends(get_user_id_from_token),
+                      sync_service: SyncService = Depends(get_sync_service),
+                      session: AsyncSession = Depends(get_async_read_session))->SyncResponseModel:
+    result = await sync_service.get_changes(session, user_id, since, limit)
+    return ORJSONResponse(result)
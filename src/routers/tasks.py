@@ -0,0 +1,130 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, Body, Query
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel
+
+from src.tokens import get_user_id_from_token
+from src.routers.dependencies import get_tasks_service
+from src.service.tasks import TasksService
+from src.schemas.tasks import (TaskReturnSchema, TaskUpdateSchema, TasksCreateSchema, TasksDoneSchema,
+                               TaskCategoryLinkSchema, TaskCategoryLinksSchema, TaskMoveSchema)
+from src.database import get_async_session, get_async_read_session
+
+
+tasks_router = APIRouter(prefix="/tasks")
+
+
+class TasksResponseModel(BaseModel):
+    tasks: list[TaskReturnSchema]
+
+
+@tasks_router.post("/", status_code=201)
+async def create_tasks(data: TasksCreateSchema = Body(),
+                       user_id: int = Depends(get_user_id_from_token),
+                       tasks_service: TasksService = Depends(get_tasks_service),
+                       session: AsyncSession = Depends(get_async_session))->TasksResponseModel:
+    tasks = await tasks_service.add_tasks(session, user_id, data.tasks)
+    return ORJSONResponse({"tasks": [item.model_dump(exclude={"user_id"}) for item in tasks]}, status_code=201)
+
+
+class GetTasksResponseModel(BaseModel):
+    tasks: list[TaskReturnSchema]
+    next_cursor: int | None = None
+
+
+@tasks_router.get("/")
+async def get_tasks(category_id: int | None = None,
+                    done: bool | None = None,
+                    after: int | None = None,
+                    limit: int = Query(default=100, ge=1, le=1000),
+                    order: Literal["id", "rank"] = "id",
+                    user_id: int = Depends(get_user_id_from_token),
+                    tasks_service: TasksService = Depends(get_tasks_service),
+                    session: AsyncSession = Depends(get_async_read_session))->GetTasksResponseModel:
+    filters = dict()
+    if not done is None: filters["done"] = done
+    tasks = await tasks_service.get_all_tasks(session, user_id, after=after, limit=limit + 1,
+                                              category_id=category_id, order=order, **filters)
+    next_cursor = None
+    if len(tasks) > limit:
+        tasks = tasks[:limit]
+        next_cursor = tasks[-1].id
+    return ORJSONResponse({
+        "tasks": [item.model_dump(exclude={"user_id"}) for item in tasks],
+        "next_cursor": next_cursor
+    })
+
+
+@tasks_router.patch("/done")
+async def set_tasks_done(data: TasksDoneSchema = Body(),
+                         user_id: int = Depends(get_user_id_from_token),
+                         tasks_service: TasksService = Depends(get_tasks_service),
+                         session: AsyncSession = Depends(get_async_session))->TasksResponseModel:
+    tasks = await tasks_service.set_tasks_done(session, user_id, data.ids, data.done)
+    return ORJSONResponse({"tasks": [item.model_dump(exclude={"user_id"}) for item in tasks]})
+
+
+class TaskCategoryLinksResponseModel(BaseModel):
+    links: list[TaskCategoryLinkSchema]
+
+
+@tasks_router.post("/categories/attach")
+async def attach_categories(data: TaskCategoryLinksSchema = Body(),
+                            user_id: int = Depends(get_user_id_from_token),
+                            tasks_service: TasksService = Depends(get_tasks_service),
+                            session: AsyncSession = Depends(get_async_session))->TaskCategoryLinksResponseModel:
+    links = await tasks_service.attach_categories(session, user_id, data.links)
+    return ORJSONResponse({"links": [item.model_dump() for item in links]})
+
+
+@tasks_router.post("/categories/detach")
+async def detach_categories(data: TaskCategoryLinksSchema = Body(),
+                            user_id: int = Depends(get_user_id_from_token),
+                            tasks_service: TasksService = Depends(get_tasks_service),
+                            session: AsyncSession = Depends(get_async_session))->TaskCategoryLinksResponseModel:
+    links = await tasks_service.detach_categories(session, user_id, data.links)
+    return ORJSONResponse({"links": [item.model_dump() for item in links]})
+
+
+class TaskResponseModel(BaseModel):
+    task: TaskReturnSchema
+
+
+@tasks_router.get("/{id}")
+async def get_task(id: int,
+                   user_id: int = Depends(get_user_id_from_token),
+                   tasks_service: TasksService = Depends(get_tasks_service),
+                   session: AsyncSession = Depends(get_async_read_session))->TaskResponseModel:
+    task = await tasks_service.get_one_task(session, user_id, id)
+    return ORJSONResponse({"task": task.model_dump(exclude={"user_id"})})
+
+
+@tasks_router.put("/{id}")
+async def update_task(id: int,
+                      data: TaskUpdateSchema = Body(),
+                      user_id: int = Depends(get_user_id_from_token),
+                      tasks_service: TasksService = Depends(get_tasks_service),
+                      session: AsyncSession = Depends(get_async_session))->TaskResponseModel:
+    task = await tasks_service.update_task(session, user_id, id, data.model_dump())
+    return ORJSONResponse({"task": task.model_dump(exclude={"user_id"})})
+
+
+@tasks_router.patch("/{id}/move")
+async def move_task(id: int,
+                    data: TaskMoveSchema = Body(),
+                    user_id: int = Depends(get_user_id_from_token),
+                    tasks_service: TasksService = Depends(get_tasks_service),
+                    session: AsyncSession = Depends(get_async_session))->TaskResponseModel:
+    task = await tasks_service.move_task(session, user_id, id, data.after_id, data.before_id)
+    return ORJSONResponse({"task": task.model_dump(exclude={"user_id"})})
+
+
+@tasks_router.delete("/{id}")
+async def delete_task(id: int,
+                      user_id: int = Depends(get_user_id_from_token),
+                      tasks_service: TasksService = Depends(get_tasks_service),
+                      session: AsyncSession = Depends(get_async_session))->TaskResponseModel:
+    task = await tasks_service.delete_task(session, user_id, id)
+    return ORJSONResponse({"task": task.model_dump(exclude={"user_id"})})
\ No newline at end of file
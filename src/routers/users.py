@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, Body
+from fastapi import APIRouter, Depends, Body, Request, Response
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 
 from src.tokens import get_user_id_from_token
-from src.database import get_async_session
+from src.database import get_async_session, get_async_read_session
 from src.routers.dependencies import get_users_service
 from src.service.users import UsersService
 from src.schemas.users import UserReturnSchema, UserUpdateSchema
+from src.etag import content_etag, etag_matches, etag_headers, not_modified
 
 users_router = APIRouter(prefix="/users")
 
@@ -16,13 +18,16 @@ class GetUserResponseSchema(BaseModel):
 
 
 @users_router.get("/")
-async def get_user(id: int = Depends(get_user_id_from_token),
-             session: AsyncSession = Depends(get_async_session),
-             user_service: UsersService = Depends(get_users_service))->GetUserResponseSchema:
-    user = await user_service.get_user(session, id=id)
-    return GetUserResponseSchema(
-        user=UserReturnSchema.model_validate(user, from_attributes=True)
-    )
+async def get_user(request: Request,
+                   id: int = Depends(get_user_id_from_token),
+                   session: AsyncSession = Depends(get_async_read_session),
+                   user_service: UsersService = Depends(get_users_service))->GetUserResponseSchema:
+    # the cached JSON is hashed and sent as it is, a hit never touches the database or the serializer
+    user = await user_service.get_user_json(session, id=id)
+    etag = content_etag(user)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    return Response(b'{"user":' + user + b'}', media_type="application/json", headers=etag_headers(etag))
 
 
 class UpdateUserResponseSchema(BaseModel):
@@ -35,8 +40,6 @@ async def update_user(id: int = Depends(get_user_id_from_token),
                       session: AsyncSession = Depends(get_async_session),
                       user_service: UsersService = Depends(get_users_service))->UpdateUserResponseSchema:
     new_user = await user_service.update_user(session, id, user.model_dump())
-    return UpdateUserResponseSchema(
-        user=UserReturnSchema.model_validate(new_user, from_attributes=True)
-    )
+    return ORJSONResponse({"user": new_user.model_dump(exclude={"hash_password"})})
 
 
@@ -0,0 +1,28 @@
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+
+MAX_BATCH_OPERATIONS = 500
+
+
+BatchOperationType = Literal["category.create", "category.update", "category.delete",
+                             "task.create", "task.update", "task.delete"]
+
+
+class BatchOperationSchema(BaseModel):
+    op: BatchOperationType
+    id: int | None = None
+    data: dict | None = None
+
+
+class BatchSchema(BaseModel):
+    # atomic commits all operations or none, best_effort commits every operation that succeeded
+    mode: Literal["atomic", "best_effort"] = "atomic"
+    operations: list[BatchOperationSchema] = Field(min_length=1, max_length=MAX_BATCH_OPERATIONS)
+
+
+class BatchResultSchema(BaseModel):
+    status: int
+    data: dict | None = None
+    error: str | list | None = None
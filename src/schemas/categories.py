@@ -21,4 +21,9 @@ class CategoryReturnSchema(BaseModel):
 
 class CategoryUpdateSchema(BaseModel):
     title: str | None = None
-    description: str | None = None
\ No newline at end of file
+    description: str | None = None
+
+
+class CategoryMoveSchema(BaseModel):
+    after_id: int | None = None
+    before_id: int | None = None
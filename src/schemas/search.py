@@ -0,0 +1,14 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+SearchType = Literal["category", "task"]
+
+
+class SearchResultSchema(BaseModel):
+    type: SearchType
+    id: int
+    title: str
+    description: str
+    rank: float
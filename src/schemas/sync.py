@@ -0,0 +1,10 @@
+from typing import Literal
+
+from pydantic import BaseModel
+
+
+class SyncChangeSchema(BaseModel):
+    type: Literal["category", "task", "link"]
+    op: Literal["upsert", "delete"]
+    version: int
+    data: dict
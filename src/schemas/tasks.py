@@ -0,0 +1,54 @@
+from pydantic import BaseModel, Field
+
+
+MAX_BATCH_SIZE = 1000
+
+
+class TaskSchema(BaseModel):
+    id: int
+    title: str
+    description: str
+    done: bool
+    user_id: int
+
+
+class TaskCreateSchema(BaseModel):
+    title: str
+    description: str
+    done: bool = False
+
+
+class TaskReturnSchema(BaseModel):
+    id: int
+    title: str
+    description: str
+    done: bool
+
+
+class TaskUpdateSchema(BaseModel):
+    title: str | None = None
+    description: str | None = None
+    done: bool | None = None
+
+
+class TaskMoveSchema(BaseModel):
+    after_id: int | None = None
+    before_id: int | None = None
+
+
+class TasksCreateSchema(BaseModel):
+    tasks: list[TaskCreateSchema] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class TasksDoneSchema(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
+    done: bool
+
+
+class TaskCategoryLinkSchema(BaseModel):
+    task_id: int
+    category_id: int
+
+
+class TaskCategoryLinksSchema(BaseModel):
+    links: list[TaskCategoryLinkSchema] = Field(min_length=1, max_length=MAX_BATCH_SIZE)
\ No newline at end of file
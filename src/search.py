@@ -0,0 +1,22 @@
+import re
+
+
+# titles are written in any language, so words are indexed as they are, without stemming;
+# the generated columns and the queries must use the same configuration
+SEARCH_CONFIG = "simple"
+
+WORD_REGEX = re.compile(r"\w+")
+
+
+def search_vector_expression() -> str:
+    return (f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+            f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'B')")
+
+
+def build_tsquery(query: str, prefix: bool = True) -> str | None:
+    # only word characters reach to_tsquery, so user input can't inject tsquery operators
+    words = WORD_REGEX.findall(query.lower())
+    if not words:
+        return None
+    terms = [f"{word}:*" if prefix else word for word in words]
+    return " & ".join(terms)
@@ -0,0 +1,145 @@
+from src.repository.categories import CategoriesRepository
+from src.repository.tasks import TasksRepository
+from src.repository.users import UsersRepository
+from src.schemas.batch import BatchOperationSchema
+from src.schemas.categories import CategoryCreateSchema, CategoryUpdateSchema
+from src.schemas.tasks import TaskCreateSchema, TaskUpdateSchema
+from src.service.categories import NotFoundCategory, UserNotFound, RequestHasNotUpdateData
+from src.service.tasks import NotFoundTask
+from src.events import publish
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.exceptions import HTTPException
+
+
+class InvalidOperation(HTTPException):
+    def __init__(self, detail):
+        super().__init__(status_code=422, detail=detail)
+
+
+class ConflictingOperation(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=409, detail="Operation conflicts with existing data")
+
+
+def database_error(error: SQLAlchemyError) -> HTTPException:
+    # the statement was rejected for this operation's values, e.g. an id out of the integer range
+    if isinstance(error, IntegrityError):
+        return ConflictingOperation()
+    return InvalidOperation("Operation was rejected by the database")
+
+
+class BatchService:
+    def __init__(self, categories_repo: CategoriesRepository, tasks_repo: TasksRepository,
+                 users_repo: UsersRepository):
+        self.categories_repo = categories_repo
+        self.tasks_repo = tasks_repo
+        self.users_repo = users_repo
+        self.handlers = {
+            "category.create": self.__create_category,
+            "category.update": self.__update_category,
+            "category.delete": self.__delete_category,
+            "task.create": self.__create_task,
+            "task.update": self.__update_task,
+            "task.delete": self.__delete_task,
+        }
+
+    async def __check_user(self, session: AsyncSession, user_id: int):
+        if not await self.users_repo.exists(session, user_id):
+            raise UserNotFound
+
+    @staticmethod
+    def __validate(schema, operation: BatchOperationSchema, needs_id: bool):
+        if needs_id and operation.id is None:
+            raise InvalidOperation(f"{operation.op} needs an id")
+        if schema is None:
+            return None
+        try:
+            return schema.model_validate(operation.data or dict())
+        except ValidationError as error:
+            raise InvalidOperation(error.errors(include_url=False, include_context=False))
+
+    @staticmethod
+    def __update_data(data) -> dict:
+        update_data = data.model_dump(exclude_none=True)
+        if update_data == {}:
+            raise RequestHasNotUpdateData
+        return update_data
+
+    async def __create_category(self, session: AsyncSession, user_id: int, operation: BatchOperationSchema):
+        data = self.__validate(CategoryCreateSchema, operation, needs_id=False)
+        id = await self.categories_repo.add_one(session, {**data.model_dump(), "user_id": user_id})
+        return 201, {"id": id, **data.model_dump()}, id
+
+    async def __update_category(self, session: AsyncSession, user_id: int, operation: BatchOperationSchema):
+        data = self.__update_data(self.__validate(CategoryUpdateSchema, operation, needs_id=True))
+        category = await self.categories_repo.update(session, data, user_id=user_id, id=operation.id)
+        if category is None:
+            raise NotFoundCategory
+        return 200, category.model_dump(), category.id
+
+    async def __delete_category(self, session: AsyncSession, user_id: int, operation: BatchOperationSchema):
+        self.__validate(None, operation, needs_id=True)
+        categories = await self.categories_repo.delete(session, user_id=user_id, id=operation.id)
+        if len(categories) == 0:
+            raise NotFoundCategory
+        return 200, categories[0].model_dump(), categories[0].id
+
+    async def __create_task(self, session: AsyncSession, user_id: int, operation: BatchOperationSchema):
+        data = self.__validate(TaskCreateSchema, operation, needs_id=False)
+        tasks = await self.tasks_repo.add_many(session, [{**data.model_dump(), "user_id": user_id}])
+        return 201, tasks[0].model_dump(exclude={"user_id"}), tasks[0].id
+
+    async def __update_task(self, session: AsyncSession, user_id: int, operation: BatchOperationSchema):
+        data = self.__update_data(self.__validate(TaskUpdateSchema, operation, needs_id=True))
+        task = await self.tasks_repo.update(session, data, user_id=user_id, id=operation.id)
+        if task is None:
+            raise NotFoundTask
+        return 200, task.model_dump(exclude={"user_id"}), task.id
+
+    async def __delete_task(self, session: AsyncSession, user_id: int, operation: BatchOperationSchema):
+        self.__validate(None, operation, needs_id=True)
+        tasks = await self.tasks_repo.delete(session, user_id=user_id, id=operation.id)
+        if len(tasks) == 0:
+            raise NotFoundTask
+        return 200, tasks[0].model_dump(exclude={"user_id"}), tasks[0].id
+
+    async def __publish(self, session: AsyncSession, user_id: int, changes: dict[tuple[str, str], list[int]]):
+        # one event per kind of change instead of one per operation
+        for (type, op), ids in changes.items():
+            await publish(session, user_id, type, op, ids)
+
+    async def __execute(self, session: AsyncSession, user_id: int, operation: BatchOperationSchema, mode: str):
+        handler = self.handlers[operation.op]
+        try:
+            if mode == "best_effort":
+                # a savepoint per operation, a failed one is undone without the others
+                async with session.begin_nested():
+                    return await handler(session, user_id, operation)
+            return await handler(session, user_id, operation)
+        except SQLAlchemyError as error:
+            raise database_error(error) from error
+
+    async def run(self, session: AsyncSession, user_id: int, operations: list[BatchOperationSchema], mode: str):
+        await self.__check_user(session, user_id)
+        results = []
+        changes: dict[tuple[str, str], list[int]] = dict()
+        for index, operation in enumerate(operations):
+            try:
+                status, data, id = await self.__execute(session, user_id, operation, mode)
+            except HTTPException as error:
+                results.append({"status": error.status_code, "error": error.detail})
+                if mode == "atomic":
+                    await session.rollback()
+                    rolled_back = [{"status": 424, "error": "Rolled back"} for _ in range(index)]
+                    not_run = [{"status": 424, "error": "Not executed"} for _ in operations[index + 1:]]
+                    return {"committed": False, "results": rolled_back + results[-1:] + not_run}
+                continue
+            results.append({"status": status, "data": data})
+            type, op = operation.op.split(".")
+            changes.setdefault((type, op), []).append(id)
+        await self.__publish(session, user_id, changes)
+        await session.commit()
+        return {"committed": True, "results": results}
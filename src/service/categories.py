@@ -2,6 +2,12 @@ from src.repository.categories import CategoriesRepository
 from src.schemas.categories import CategoryCreateSchema
 from src.repository.users import UsersRepository
 
+from src.config import BULK_CHUNK_SIZE
+from src.events import publish
+from src.maintenance import rebalancer as shared_rebalancer
+
+from typing import AsyncIterator
+
 from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.exceptions import HTTPException
 
@@ -26,14 +32,25 @@ class UserNotFound(HTTPException):
         super().__init__(status_code=404, detail="User not found")
 
 
+class CursorNotFound(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=400, detail="The after cursor no longer exists, start over from the first page")
+
+
+class InvalidMove(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=400, detail="Expected either after_id or before_id of another category")
+
+
 class CategoriesService:
-    def __init__(self, categories_repo: CategoriesRepository, users_repo: UsersRepository):
+    def __init__(self, categories_repo: CategoriesRepository, users_repo: UsersRepository,
+                 rebalancer=shared_rebalancer):
         self.categories_repo = categories_repo
         self.users_repo = users_repo
+        self.rebalancer = rebalancer
 
     async def __check_user(self, session: AsyncSession, user_id):
-        user = await self.users_repo.get_one(session, id=user_id)
-        if user is None:
+        if not await self.users_repo.exists(session, user_id):
             raise UserNotFound
 
     async def add_category(self, session: AsyncSession, user_id: int, data: CategoryCreateSchema):
@@ -42,6 +59,7 @@ class CategoriesService:
             **data.model_dump(),
             "user_id": user_id,
         })
+        await publish(session, user_id, "category", "create", [category])
         await session.commit()
         return category
 
@@ -51,6 +69,7 @@ class CategoriesService:
         if len(categories) == 0:
             raise NotFoundCategory
         category = categories[0]
+        await publish(session, user_id, "category", "delete", [category.id])
         await session.commit()
         return category
 
@@ -65,14 +84,39 @@ class CategoriesService:
         category = await self.categories_repo.update(session, update_data, user_id=user_id, **filters)
         if category is None:
             raise NotFoundCategory
+        await publish(session, user_id, "category", "update", [category.id])
         await session.commit()
         return category
 
-    async def get_all_category(self, session: AsyncSession, user_id: int, **filters):
+    async def move_category(self, session: AsyncSession, user_id: int, id: int, after_id: int | None = None,
+                            before_id: int | None = None):
         await self.__check_user(session, user_id)
-        categories = await self.categories_repo.get_all(session, user_id=user_id, **filters)
+        anchor_id = after_id if after_id is not None else before_id
+        if (after_id is None) == (before_id is None) or anchor_id == id:
+            raise InvalidMove
+        # a missing anchor matches no row either, both are reported as not found
+        category, rebalance = await self.categories_repo.move(session, user_id, id, after_id, before_id)
+        if category is None:
+            raise NotFoundCategory
+        await publish(session, user_id, "category", "update", [category.id])
+        await session.commit()
+        if rebalance:
+            self.rebalancer.schedule(self.categories_repo, "category", user_id)
+        return category
+
+    async def get_all_category(self, session: AsyncSession, user_id: int, after: int | None = None,
+                               limit: int | None = None, order: str = "id", **filters):
+        await self.__check_user(session, user_id)
+        categories = await self.categories_repo.get_all(session, after=after, limit=limit, order=order,
+                                                        user_id=user_id, **filters)
+        if categories is None:
+            raise CursorNotFound
         return categories
 
+    async def stream_all_category(self, session: AsyncSession, user_id: int, after: int | None = None, **filters):
+        await self.__check_user(session, user_id)
+        return self.categories_repo.stream_all(session, after=after, user_id=user_id, **filters)
+
     async def get_one_category(self, session: AsyncSession, user_id: int, id: int):
         await self.__check_user(session, user_id)
         category = await self.categories_repo.get_one(session=session, user_id=user_id, id=id)
@@ -80,5 +124,39 @@ class CategoriesService:
             raise NotFoundCategory
         return category
 
+    async def get_category_version(self, session: AsyncSession, user_id: int, id: int) -> int:
+        await self.__check_user(session, user_id)
+        version = await self.categories_repo.get_version(session, user_id, id)
+        if version is None:
+            raise NotFoundCategory
+        return version
 
+    async def get_categories_version(self, session: AsyncSession, user_id: int) -> tuple[int, int]:
+        await self.__check_user(session, user_id)
+        return await self.categories_repo.get_list_version(session, user_id)
 
+    async def import_categories(self, session: AsyncSession, user_id: int,
+                                rows: AsyncIterator[tuple[int, CategoryCreateSchema | None, str | None]]):
+        await self.__check_user(session, user_id)
+        ids = []
+        errors = []
+        chunk = []
+        async for line, data, error in rows:
+            if error is not None:
+                errors.append({"line": line, "error": error})
+                continue
+            chunk.append({**data.model_dump(), "user_id": user_id})
+            if len(chunk) >= BULK_CHUNK_SIZE:
+                ids += await self.categories_repo.add_many(session, chunk)
+                chunk = []
+        if chunk:
+            ids += await self.categories_repo.add_many(session, chunk)
+        if ids:
+            await publish(session, user_id, "category", "create", ids)
+        # the whole import is one transaction, nothing is saved if the upload breaks off
+        await session.commit()
+        return {
+            "created": len(ids),
+            "ids": ids,
+            "errors": errors
+        }
@@ -0,0 +1,30 @@
+from src.repository.search import SearchRepository
+from src.repository.users import UsersRepository
+from src.search import build_tsquery
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.exceptions import HTTPException
+
+
+class UserNotFound(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=404, detail="User not found")
+
+
+class SearchService:
+    def __init__(self, search_repo: SearchRepository, users_repo: UsersRepository):
+        self.search_repo = search_repo
+        self.users_repo = users_repo
+
+    async def __check_user(self, session: AsyncSession, user_id: int):
+        if not await self.users_repo.exists(session, user_id):
+            raise UserNotFound
+
+    async def search(self, session: AsyncSession, user_id: int, query: str, types: list[str],
+                     prefix: bool = True, offset: int = 0, limit: int | None = None):
+        await self.__check_user(session, user_id)
+        tsquery = build_tsquery(query, prefix=prefix)
+        if tsquery is None:
+            return []
+        results = await self.search_repo.search(session, user_id, tsquery, types, offset=offset, limit=limit)
+        return results
@@ -0,0 +1,32 @@
+from src.repository.sync import SyncRepository
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.exceptions import HTTPException
+
+
+class UserNotFound(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=404, detail="User not found")
+
+
+class SyncService:
+    def __init__(self, sync_repo: SyncRepository):
+        self.sync_repo = sync_repo
+
+    async def get_changes(self, session: AsyncSession, user_id: int, since: int, limit: int):
+        await self.sync_repo.begin_snapshot(session)
+        floor = await self.sync_repo.get_floor(session, user_id)
+        if floor is None:
+            raise UserNotFound
+        if 0 < since < floor:
+            # deletions after this cursor were purged, only a full sync is complete
+            return {"changes": [], "cursor": 0, "has_more": True, "reset": True}
+        changes = await self.sync_repo.get_changes(session, user_id, since, limit + 1)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        return {
+            "changes": changes,
+            "cursor": changes[-1]["version"] if changes else since,
+            "has_more": has_more,
+            "reset": False
+        }
@@ -0,0 +1,134 @@
+from src.repository.tasks import TasksRepository
+from src.repository.users import UsersRepository
+from src.schemas.tasks import TaskCreateSchema, TaskCategoryLinkSchema
+
+from src.events import publish
+from src.maintenance import rebalancer as shared_rebalancer
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi.exceptions import HTTPException
+
+
+class NotFoundTask(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=404, detail="Task not found")
+
+
+class RequestHasNotUpdateData(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=400, detail="Request has not update data")
+
+
+class UserNotFound(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=404, detail="User not found")
+
+
+class CursorNotFound(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=400, detail="The after cursor no longer exists, start over from the first page")
+
+
+class InvalidMove(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=400, detail="Expected either after_id or before_id of another task")
+
+
+class TasksService:
+    def __init__(self, tasks_repo: TasksRepository, users_repo: UsersRepository, rebalancer=shared_rebalancer):
+        self.tasks_repo = tasks_repo
+        self.users_repo = users_repo
+        self.rebalancer = rebalancer
+
+    async def __check_user(self, session: AsyncSession, user_id: int):
+        if not await self.users_repo.exists(session, user_id):
+            raise UserNotFound
+
+    async def add_tasks(self, session: AsyncSession, user_id: int, data: list[TaskCreateSchema]):
+        await self.__check_user(session, user_id)
+        tasks = await self.tasks_repo.add_many(session, [
+            {**item.model_dump(), "user_id": user_id} for item in data
+        ])
+        await publish(session, user_id, "task", "create", [task.id for task in tasks])
+        await session.commit()
+        return tasks
+
+    async def get_all_tasks(self, session: AsyncSession, user_id: int, after: int | None = None,
+                            limit: int | None = None, category_id: int | None = None, order: str = "id",
+                            **filters):
+        await self.__check_user(session, user_id)
+        tasks = await self.tasks_repo.get_all(session, after=after, limit=limit, category_id=category_id,
+                                              order=order, user_id=user_id, **filters)
+        if tasks is None:
+            raise CursorNotFound
+        return tasks
+
+    async def get_one_task(self, session: AsyncSession, user_id: int, id: int):
+        await self.__check_user(session, user_id)
+        task = await self.tasks_repo.get_one(session, user_id=user_id, id=id)
+        if task is None:
+            raise NotFoundTask
+        return task
+
+    async def update_task(self, session: AsyncSession, user_id: int, id: int, data: dict):
+        await self.__check_user(session, user_id)
+        update_data = dict()
+        for key, value in data.items():
+            if not value is None:
+                update_data[key] = value
+        if update_data == {}:
+            raise RequestHasNotUpdateData
+        task = await self.tasks_repo.update(session, update_data, user_id=user_id, id=id)
+        if task is None:
+            raise NotFoundTask
+        await publish(session, user_id, "task", "update", [task.id])
+        await session.commit()
+        return task
+
+    async def move_task(self, session: AsyncSession, user_id: int, id: int, after_id: int | None = None,
+                        before_id: int | None = None):
+        await self.__check_user(session, user_id)
+        anchor_id = after_id if after_id is not None else before_id
+        if (after_id is None) == (before_id is None) or anchor_id == id:
+            raise InvalidMove
+        task, rebalance = await self.tasks_repo.move(session, user_id, id, after_id, before_id)
+        if task is None:
+            raise NotFoundTask
+        await publish(session, user_id, "task", "update", [task.id])
+        await session.commit()
+        if rebalance:
+            self.rebalancer.schedule(self.tasks_repo, "task", user_id)
+        return task
+
+    async def set_tasks_done(self, session: AsyncSession, user_id: int, ids: list[int], done: bool):
+        await self.__check_user(session, user_id)
+        tasks = await self.tasks_repo.set_done(session, user_id, ids, done)
+        if tasks:
+            await publish(session, user_id, "task", "update", [task.id for task in tasks])
+        await session.commit()
+        return tasks
+
+    async def delete_task(self, session: AsyncSession, user_id: int, id: int):
+        await self.__check_user(session, user_id)
+        tasks = await self.tasks_repo.delete(session, user_id=user_id, id=id)
+        if len(tasks) == 0:
+            raise NotFoundTask
+        await publish(session, user_id, "task", "delete", [tasks[0].id])
+        await session.commit()
+        return tasks[0]
+
+    async def attach_categories(self, session: AsyncSession, user_id: int, links: list[TaskCategoryLinkSchema]):
+        await self.__check_user(session, user_id)
+        links = await self.tasks_repo.attach_categories(session, user_id, links)
+        if links:
+            await publish(session, user_id, "link", "create", [[link.task_id, link.category_id] for link in links])
+        await session.commit()
+        return links
+
+    async def detach_categories(self, session: AsyncSession, user_id: int, links: list[TaskCategoryLinkSchema]):
+        await self.__check_user(session, user_id)
+        links = await self.tasks_repo.detach_categories(session, user_id, links)
+        if links:
+            await publish(session, user_id, "link", "delete", [[link.task_id, link.category_id] for link in links])
+        await session.commit()
+        return links
\ No newline at end of file
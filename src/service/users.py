@@ -3,11 +3,10 @@ import datetime
 from src.repository.users import UsersRepository
 from src.hasher import hasher
 from src.schemas.users import UserCreateSchema, UserAuthSchema, UserReturnSchema
-from src.mail import send_email_confirmation
 from src.tokens import (create_email_confirmation_token, create_user_id_token,
                         get_id_from_email_confirmation_token, create_random_string)
 from src.repository.sessions import SessionsRepository
-from src.config import EXP_REFRESH
+from src.config import EXP_REFRESH, SESSIONS_PER_USER
 from src.hasher import hasher
 
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -34,11 +33,6 @@ class InvalidEmailOrPassword(HTTPException):
         super().__init__(status_code=401, detail="Incorrect email or password")
 
 
-class ExpiredSession(HTTPException):
-    def __init__(self):
-        super().__init__(status_code=401, detail="Expired session")
-
-
 class InvalidRefreshToken(HTTPException):
     def __init__(self):
         super().__init__(status_code=401, detail="Invalid refresh token")
@@ -68,7 +62,15 @@ class UsersService:
 
 
     async def get_user(self, session: AsyncSession, id: int):
-        user = await self.users_repo.get_one(session, id=id)
+        user = await self.users_repo.get_public(session, id=id)
+
+        if user is None:
+            raise ServerError
+
+        return user
+
+    async def get_user_json(self, session: AsyncSession, id: int) -> bytes:
+        user = await self.users_repo.get_public_json(session, id=id)
 
         if user is None:
             raise ServerError
@@ -81,13 +83,15 @@ class UsersService:
         if user_from_db is None:
             raise ServerError
 
+        if not await hasher.check_str(user_from_db.hash_password, user.password):
+            raise InvalidEmailOrPassword
+
         refresh_token = create_random_string()
-        await self.__check_sessions_count(session, user_from_db.id)
-        await self.sessions_repo.add_one(session, {
+        await self.sessions_repo.add_one_limited(session, {
             "token": refresh_token,
             "expires_in": datetime.datetime.utcnow() + EXP_REFRESH,
             "user_id": user_from_db.id
-        })
+        }, limit=SESSIONS_PER_USER)
         await session.commit()
 
         access_token = create_user_id_token(id=user_from_db.id)
@@ -97,36 +101,27 @@ class UsersService:
             "refresh_token": refresh_token
         }
 
-        if hasher.check_str(user_from_db.hash_password, user.password):
-            return {
-                "tokens": tokens,
-                "user": UserReturnSchema.model_validate(user_from_db, from_attributes=True)
-            }
-        else:
-            raise InvalidEmailOrPassword
-
-    async def __check_sessions_count(self, session: AsyncSession, user_id: int):
-        user_sessions = await self.sessions_repo.get_all(session, user_id=user_id)
-        if len(user_sessions) >= 5:
-            user_sessions.sort(key=lambda x:x.expires_in)
-            await self.sessions_repo.delete(session, id=user_sessions[0].id)
-
-    async def __check_sessions_expire(self, session: AsyncSession, token):
-        user_session = await self.sessions_repo.get_one(session, token=token)
-        if user_session is None:
-            raise InvalidRefreshToken
-        if user_session.expires_in <= datetime.datetime.utcnow():
-            await self.sessions_repo.delete(session, id=user_session.id)
+        if hasher.needs_rehash(user_from_db.hash_password):
+            await self.users_repo.update_one(session, user_from_db.id, {
+                "hash_password": await hasher.hash_str(user.password)
+            })
             await session.commit()
-            raise ExpiredSession
+
+        return {
+            "tokens": tokens,
+            "user": UserReturnSchema.model_validate(user_from_db, from_attributes=True)
+        }
 
     async def refresh_tokens(self, session: AsyncSession, refresh_token: str):
-        await self.__check_sessions_expire(session, token=refresh_token)
         new_refresh_token = create_random_string()
-        user_session = await self.sessions_repo.update(session, token=refresh_token, data={
+        now = datetime.datetime.utcnow()
+        # unknown, expired and concurrently rotated tokens all match no row
+        user_session = await self.sessions_repo.rotate(session, token=refresh_token, now=now, data={
             "token": new_refresh_token,
-            "expires_in": datetime.datetime.utcnow() + EXP_REFRESH,
+            "expires_in": now + EXP_REFRESH,
         })
+        if user_session is None:
+            raise InvalidRefreshToken
         await session.commit()
 
         user_id = user_session.user_id
@@ -149,11 +144,9 @@ class UsersService:
         id = await self.users_repo.add_one(session, {
             "email": user.email,
             "name": user.name,
-            "hash_password": hasher.hash_str(user.password)
+            "hash_password": await hasher.hash_str(user.password)
         })
 
-        await session.commit()
-
         refresh_token = create_random_string()
 
         await self.sessions_repo.add_one(session, {
@@ -162,12 +155,20 @@ class UsersService:
             "user_id": id
         })
 
-        await session.commit()
+        from src.mail import send_email_confirmation, MailQueueIsFull
 
+        # the email is queued before the commit, a full queue rolls the sign-up back,
+        # so the account does not exist without its email and the client can simply retry
         token_confirmation_email = create_email_confirmation_token(id=id)
-        send_email_confirmation(recipient_email=user.email,
-                                recipient_name=user.email,
-                                link_token=f"http://127.0.0.1:8000/auth/verify?token={token_confirmation_email}")
+        try:
+            send_email_confirmation(recipient_email=user.email,
+                                    recipient_name=user.email,
+                                    link_token=f"http://127.0.0.1:8000/auth/verify?token={token_confirmation_email}")
+        except MailQueueIsFull:
+            await session.rollback()
+            raise
+
+        await session.commit()
 
         return {
             "access_token": create_user_id_token(id),
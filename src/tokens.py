@@ -1,15 +1,20 @@
 from datetime import UTC, datetime, timedelta
+import hmac
 import string
 import random
 
 from jwt import encode as jwt_encode, decode as jwt_decode
 from jwt.exceptions import  ExpiredSignatureError, InvalidTokenError
 from fastapi.exceptions import HTTPException
-from fastapi import Depends
+from fastapi import Depends, Header
 
-from src.config import SECRET_KEY, ALGORITHM
+from src.config import SECRET_KEY, ALGORITHM, TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL
 from src.oauth2_scheme import oauth2_scheme
-from src.config import EXP_ACCESS, EXP_EMAIL
+from src.config import EXP_ACCESS, EXP_EMAIL, INTERNAL_TOKEN
+from src.cache import TTLCache
+
+
+access_tokens_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
 
 
 def create_random_string():
@@ -23,6 +28,11 @@ class ExpiredPeriodConfirmation(HTTPException):
         super().__init__(status_code=401, detail="Period confirmation expired")
 
 
+class InvalidInternalToken(HTTPException):
+    def __init__(self):
+        super().__init__(status_code=401, detail="Invalid internal token")
+
+
 class ExpiredAccessToken(HTTPException):
     def __init__(self):
         super().__init__(status_code=401, detail="Expired access token")
@@ -62,14 +72,20 @@ def create_user_id_token(id: int):
     })
 
 
-def get_user_id_from_token(token: str = Depends(oauth2_scheme)):
+async def get_user_id_from_token(token: str = Depends(oauth2_scheme)):
+    user_id = access_tokens_cache.get(token)
+    if user_id is not None:
+        return user_id
     try:
         payload = get_payload_from_jwt_token(token)
-        return get_id_from_payload(payload, "auth")
+        user_id = get_id_from_payload(payload, "auth")
     except ExpiredSignatureError:
         raise ExpiredAccessToken
     except InvalidTokenError:
         raise HTTPException(status_code=500, detail="Server error")
+    # a cached token must never outlive its own expiration time
+    access_tokens_cache.set(token, user_id, expires_at=payload["exp"])
+    return user_id
 
 
 def get_id_from_payload(payload: dict, type: str):
@@ -79,3 +95,11 @@ def get_id_from_payload(payload: dict, type: str):
         return payload.get("user_id")
     else:
         raise HTTPException(status_code=500, detail="Server error")
+
+
+async def require_internal_token(authorization: str | None = Header(default=None)):
+    if INTERNAL_TOKEN is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(token.encode(), INTERNAL_TOKEN.encode()):
+        raise InvalidInternalToken
@@ -0,0 +1,20 @@
+import os
+
+
+# src.config validates the environment on import, the tests only need it to be complete
+TEST_ENVIRON = {
+    "DB_USER": "test",
+    "DB_PASS": "test",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_NAME": "test",
+    "SECRET_KEY": "test",
+    "ALGORITHM": "HS256",
+    "EXP_ACCESS": "15m",
+    "EXP_EMAIL": "1d",
+    "EXP_REFRESH": "30d",
+    "REAPER_ENABLED": "false",
+}
+
+for name, value in TEST_ENVIRON.items():
+    os.environ.setdefault(name, value)
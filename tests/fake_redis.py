@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+
+class FakeRedisServer:
+    """A RESP server with just the commands the cache backend sends, kept in memory."""
+
+    def __init__(self):
+        self.hashes: dict[bytes, dict[bytes, bytes]] = dict()
+        self.expires: dict[bytes, float] = dict()
+        self.commands: list[list[bytes]] = []
+        self.server: asyncio.Server | None = None
+        self.port: int | None = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://127.0.0.1:{self.port}"
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.__serve, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def names(self) -> list[str]:
+        return [command[0].decode().upper() for command in self.commands]
+
+    def __expire_stale(self, key: bytes):
+        if key in self.expires and self.expires[key] <= time.monotonic():
+            self.hashes.pop(key, None)
+            del self.expires[key]
+
+    def __execute(self, command: list[bytes]):
+        name, args = command[0].decode().upper(), command[1:]
+        for key in args[:1]:
+            self.__expire_stale(key)
+        if name == "PING":
+            return "PONG"
+        if name == "HGET":
+            return self.hashes.get(args[0], dict()).get(args[1])
+        if name == "HSET":
+            fields = self.hashes.setdefault(args[0], dict())
+            added = 0
+            for field, value in zip(args[1::2], args[2::2]):
+                added += field not in fields
+                fields[field] = value
+            return added
+        if name == "EXPIRE":
+            if args[0] not in self.hashes:
+                return 0
+            self.expires[args[0]] = time.monotonic() + int(args[1])
+            return 1
+        if name == "DEL":
+            deleted = 0
+            for key in args:
+                deleted += self.hashes.pop(key, None) is not None
+                self.expires.pop(key, None)
+            return deleted
+        return Exception(f"ERR unknown command '{name}'")
+
+    async def __read_command(self, reader: asyncio.StreamReader) -> list[bytes]:
+        header = await reader.readline()
+        if not header:
+            raise ConnectionError
+        count = int(header[1:])
+        command = []
+        for _ in range(count):
+            length = int((await reader.readline())[1:])
+            command.append((await reader.readexactly(length + 2))[:-2])
+        return command
+
+    def __encode(self, reply) -> bytes:
+        if reply is None:
+            return b"$-1\r\n"
+        if isinstance(reply, Exception):
+            return f"-{reply}\r\n".encode()
+        if isinstance(reply, str):
+            return f"+{reply}\r\n".encode()
+        if isinstance(reply, int):
+            return f":{reply}\r\n".encode()
+        if isinstance(reply, bytes):
+            return b"$%d\r\n%s\r\n" % (len(reply), reply)
+        return b"*%d\r\n" % len(reply) + b"".join(self.__encode(item) for item in reply)
+
+    async def __serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        queued: list[list[bytes]] | None = None
+        try:
+            while True:
+                command = await self.__read_command(reader)
+                self.commands.append(command)
+                name = command[0].decode().upper()
+                if name == "MULTI":
+                    queued = []
+                    reply = "OK"
+                elif name == "EXEC":
+                    reply = [self.__execute(item) for item in queued]
+                    queued = None
+                elif queued is not None:
+                    queued.append(command)
+                    reply = "QUEUED"
+                else:
+                    reply = self.__execute(command)
+                writer.write(self.__encode(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
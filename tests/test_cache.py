@@ -0,0 +1,214 @@
+import asyncio
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+import src.cache
+import src.database
+from src.cache import RedisCacheBackend, invalidate_after_commit
+from src.repository.categories import CategoriesRepository
+from src.repository.users import UsersRepository
+from tests.fake_redis import FakeRedisServer
+
+
+class FakeResult:
+    def __init__(self, rows: list[tuple]):
+        self.rows = rows
+
+    def all(self):
+        return self.rows
+
+    def one(self):
+        return self.rows[0]
+
+    def one_or_none(self):
+        return self.rows[0] if self.rows else None
+
+    def scalar_one_or_none(self):
+        return self.rows[0][0] if self.rows else None
+
+
+class FakeSession:
+    def __init__(self, rows: list[tuple], replica: bool = False):
+        self.rows = rows
+        self.statements = 0
+        self.closed = False
+        self.sync_session = SimpleNamespace(info={"replica": replica})
+
+    @property
+    def info(self) -> dict:
+        return self.sync_session.info
+
+    async def execute(self, stmt):
+        self.statements += 1
+        return FakeResult(self.rows)
+
+    async def commit(self):
+        invalidate_after_commit(self.sync_session)
+        await asyncio.gather(*src.cache.pending_invalidations)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.closed = True
+
+
+def run_with_redis(scenario):
+    async def main():
+        server = FakeRedisServer()
+        await server.start()
+        backend = RedisCacheBackend(server.url, ttl=300)
+        try:
+            await scenario(server, backend)
+        finally:
+            await backend.redis.connection_pool.disconnect()
+            await server.stop()
+
+    asyncio.run(main())
+
+
+def test_redis_backend_stores_fields_with_a_ttl():
+    async def scenario(server, backend):
+        await backend.set("categories:1", "all", b"[]")
+        await backend.set("categories:1", "one", b"{}", ttl=60)
+
+        assert await backend.get("categories:1", "all") == b"[]"
+        assert await backend.get("categories:1", "missing") is None
+        assert server.hashes[b"categories:1"] == {b"all": b"[]", b"one": b"{}"}
+        assert server.expires[b"categories:1"] > 0
+
+        await backend.delete("categories:1")
+        assert await backend.get("categories:1", "all") is None
+
+    run_with_redis(scenario)
+
+
+def test_redis_backend_fails_open():
+    async def scenario():
+        # nothing listens on the port, reads miss and writes are dropped
+        backend = RedisCacheBackend("redis://127.0.0.1:1", ttl=300)
+        assert await backend.get("categories:1", "all") is None
+        await backend.set("categories:1", "all", b"[]")
+        await backend.delete("categories:1")
+
+    asyncio.run(scenario())
+
+
+def test_categories_are_read_through_the_cache():
+    async def scenario(server, backend):
+        repo = CategoriesRepository(cache=backend)
+        session = FakeSession([(1, "home", "chores"), (2, "work", "meetings")])
+
+        first = await repo.get_all(session, user_id=1)
+        second = await repo.get_all(session, user_id=1)
+        one = await repo.get_one(session, user_id=1, id=1)
+        again = await repo.get_one(session, user_id=1, id=1)
+
+        assert [item.model_dump() for item in second] == [item.model_dump() for item in first]
+        assert again.model_dump() == one.model_dump() == {"id": 1, "title": "home", "description": "chores"}
+        # one query per distinct read, the repeats were served by the fake server
+        assert session.statements == 2
+        cached = server.hashes[b"categories:1"]
+        assert len(cached) == 2
+        assert orjson.loads(next(value for field, value in cached.items() if field.startswith(b"all"))) == [
+            {"id": 1, "title": "home", "description": "chores"},
+            {"id": 2, "title": "work", "description": "meetings"},
+        ]
+
+    run_with_redis(scenario)
+
+
+def test_writes_invalidate_now_and_after_commit():
+    async def scenario(server, backend):
+        repo = CategoriesRepository(cache=backend)
+        session = FakeSession([(1, "home", "chores")])
+        await repo.get_all(session, user_id=1)
+        assert b"categories:1" in server.hashes
+
+        await repo.update(session, {"title": "house"}, user_id=1, id=1)
+        assert b"categories:1" not in server.hashes
+
+        # a read that raced with the transaction refills the old rows before the commit
+        await repo.get_all(session, user_id=1)
+        assert b"categories:1" in server.hashes
+        await session.commit()
+        assert b"categories:1" not in server.hashes
+        assert server.names().count("DEL") == 2
+
+        statements = session.statements
+        await repo.get_all(session, user_id=1)
+        assert session.statements == statements + 1
+
+    run_with_redis(scenario)
+
+
+def test_rolled_back_write_is_not_invalidated_again():
+    async def scenario(server, backend):
+        repo = CategoriesRepository(cache=backend)
+        session = FakeSession([(1, "home", "chores")])
+        await repo.update(session, {"title": "house"}, user_id=1, id=1)
+        src.cache.forget_invalidations(session.sync_session)
+        await session.commit()
+
+        assert server.names().count("DEL") == 1
+
+    run_with_redis(scenario)
+
+
+def test_entries_are_kept_per_user():
+    async def scenario(server, backend):
+        repo = CategoriesRepository(cache=backend)
+        first_user = FakeSession([(1, "home", "chores")])
+        second_user = FakeSession([(2, "work", "meetings")])
+        await repo.get_all(first_user, user_id=1)
+        await repo.get_all(second_user, user_id=2)
+        assert set(server.hashes) == {b"categories:1", b"categories:2"}
+
+        await repo.delete(first_user, user_id=1, id=1)
+        await first_user.commit()
+
+        assert set(server.hashes) == {b"categories:2"}
+        statements = second_user.statements
+        assert [item.id for item in await repo.get_all(second_user, user_id=2)] == [2]
+        assert second_user.statements == statements
+
+    run_with_redis(scenario)
+
+
+@pytest.mark.parametrize("read", ["get_all", "get_one", "get_version", "get_list_version"])
+def test_replica_misses_are_read_on_the_primary(monkeypatch, read):
+    async def scenario(server, backend):
+        repo = CategoriesRepository(cache=backend)
+        replica = FakeSession([(1, "home", "chores")], replica=True)
+        primary = FakeSession([(1, "home", "chores")])
+        monkeypatch.setattr(src.database, "async_sessionfactory", lambda: primary)
+        arguments = {"get_version": (1, 1), "get_list_version": (1,)}.get(read, ())
+        filters = {"get_all": {"user_id": 1}, "get_one": {"user_id": 1, "id": 1}}.get(read, {})
+
+        await getattr(repo, read)(replica, *arguments, **filters)
+        assert (replica.statements, primary.statements) == (0, 1)
+        assert primary.closed
+        assert list(server.hashes) == [b"categories:1"]
+
+        # the next replica read is a hit
+        await getattr(repo, read)(replica, *arguments, **filters)
+        assert (replica.statements, primary.statements) == (0, 1)
+
+    run_with_redis(scenario)
+
+
+def test_replica_user_exists_is_cached(monkeypatch):
+    async def scenario(server, backend):
+        repo = UsersRepository(cache=backend)
+        replica = FakeSession([(1,)], replica=True)
+        primary = FakeSession([(1,)])
+        monkeypatch.setattr(src.database, "async_sessionfactory", lambda: primary)
+
+        assert await repo.exists(replica, 1)
+        assert await repo.exists(replica, 1)
+        assert (replica.statements, primary.statements) == (0, 1)
+        assert server.hashes[b"user:1"] == {b"alive": b"1"}
+
+    run_with_redis(scenario)
@@ -0,0 +1,11 @@
+import pytest
+
+from src.config import Settings, ConfigError
+from tests.conftest import TEST_ENVIRON
+
+
+def test_sessions_per_user_must_allow_a_session():
+    with pytest.raises(ConfigError, match="SESSIONS_PER_USER"):
+        Settings.from_env({**TEST_ENVIRON, "SESSIONS_PER_USER": "0"})
+
+    assert Settings.from_env({**TEST_ENVIRON, "SESSIONS_PER_USER": "1"}).SESSIONS_PER_USER == 1
@@ -0,0 +1,147 @@
+import asyncio
+
+import dns.asyncresolver
+import dns.exception
+import dns.resolver
+import pytest
+
+import src.cache
+from src.email_validation import EmailValidator, resolve_mail_domain
+
+
+class StubResolver:
+    def __init__(self, answers: dict[str, bool | None], delay: float = 0):
+        self.answers = answers
+        self.delay = delay
+        self.calls = []
+
+    async def __call__(self, domain: str) -> bool | None:
+        self.calls.append(domain)
+        await asyncio.sleep(self.delay)
+        return self.answers.get(domain, False)
+
+
+class Clock:
+    def __init__(self, now: float = 1000):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(src.cache.time, "time", clock)
+    return clock
+
+
+def test_syntax_only_fast_path_skips_the_resolver():
+    resolver = StubResolver({})
+    validator = EmailValidator(resolver=resolver, check_dns=False)
+
+    assert asyncio.run(validator.validate("user@nowhere.example")) is True
+    assert asyncio.run(validator.validate("not an email")) is False
+    assert resolver.calls == []
+
+
+def test_malformed_address_never_reaches_the_resolver():
+    resolver = StubResolver({"example.com": True})
+    validator = EmailValidator(resolver=resolver)
+
+    for email in ("plain", "user@", "@example.com", "user@example", "user@-bad.com"):
+        assert asyncio.run(validator.validate(email)) is False
+    assert resolver.calls == []
+
+
+def test_mx_answer_is_cached_per_domain(clock):
+    resolver = StubResolver({"example.com": True})
+    validator = EmailValidator(resolver=resolver, ttl=60, negative_ttl=10)
+
+    assert asyncio.run(validator.validate("a@example.com")) is True
+    assert asyncio.run(validator.validate("b@Example.COM")) is True
+    assert resolver.calls == ["example.com"]
+
+    clock.now += 61
+    assert asyncio.run(validator.validate("c@example.com")) is True
+    assert resolver.calls == ["example.com", "example.com"]
+
+
+def test_missing_domain_is_cached_for_the_negative_ttl(clock):
+    resolver = StubResolver({"example.com": True, "gone.example": False})
+    validator = EmailValidator(resolver=resolver, ttl=60, negative_ttl=10)
+
+    assert asyncio.run(validator.validate("a@gone.example")) is False
+    clock.now += 9
+    assert asyncio.run(validator.validate("b@gone.example")) is False
+    assert resolver.calls == ["gone.example"]
+
+    # the negative answer expires first, the positive one is still cached
+    asyncio.run(validator.validate("a@example.com"))
+    clock.now += 2
+    assert asyncio.run(validator.validate("c@gone.example")) is False
+    assert asyncio.run(validator.validate("b@example.com")) is True
+    assert resolver.calls == ["gone.example", "example.com", "gone.example"]
+
+
+def test_cache_is_bounded_by_size(clock):
+    resolver = StubResolver({"a.example": True, "b.example": True, "c.example": True})
+    validator = EmailValidator(resolver=resolver, cache_size=2)
+
+    for domain in ("a.example", "b.example", "c.example"):
+        asyncio.run(validator.validate(f"user@{domain}"))
+    assert len(validator.cache.data) == 2
+
+    # the least recently used domain was evicted and is looked up again
+    asyncio.run(validator.validate("user@a.example"))
+    assert resolver.calls == ["a.example", "b.example", "c.example", "a.example"]
+
+
+def test_timeout_lets_the_address_through_uncached(clock):
+    resolver = StubResolver({"slow.example": None})
+    validator = EmailValidator(resolver=resolver)
+
+    assert asyncio.run(validator.validate("a@slow.example")) is True
+    assert asyncio.run(validator.validate("b@slow.example")) is True
+    assert resolver.calls == ["slow.example", "slow.example"]
+
+
+def test_concurrent_lookups_of_a_domain_are_shared(clock):
+    resolver = StubResolver({"example.com": True}, delay=0.05)
+    validator = EmailValidator(resolver=resolver)
+
+    async def scenario():
+        return await asyncio.gather(*(validator.validate(f"user{i}@example.com") for i in range(5)))
+
+    assert asyncio.run(scenario()) == [True] * 5
+    assert resolver.calls == ["example.com"]
+
+
+class StubDNS:
+    def __init__(self, records: dict[tuple[str, str], object]):
+        self.records = records
+        self.queries = []
+
+    async def __call__(self, domain: str, rdtype: str, lifetime: float):
+        self.queries.append((domain, rdtype))
+        answer = self.records.get((domain, rdtype), dns.resolver.NXDOMAIN())
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+
+@pytest.mark.parametrize("records, expected, queries", [
+    ({("example.com", "MX"): ["mx"]}, True, [("example.com", "MX")]),
+    ({("example.com", "MX"): dns.resolver.NoAnswer(), ("example.com", "A"): ["a"]}, True,
+     [("example.com", "MX"), ("example.com", "A")]),
+    ({("example.com", "MX"): dns.resolver.NoAnswer(), ("example.com", "A"): dns.resolver.NoAnswer()}, False,
+     [("example.com", "MX"), ("example.com", "A")]),
+    ({}, False, [("example.com", "MX")]),
+    ({("example.com", "MX"): dns.exception.Timeout()}, None, [("example.com", "MX")]),
+])
+def test_resolve_mail_domain(monkeypatch, records, expected, queries):
+    stub = StubDNS(records)
+    monkeypatch.setattr(dns.asyncresolver, "resolve", stub)
+
+    assert asyncio.run(resolve_mail_domain("example.com", timeout=1)) is expected
+    assert stub.queries == queries
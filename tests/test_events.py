@@ -0,0 +1,239 @@
+import asyncio
+
+import asyncpg
+import orjson
+import pytest
+
+import src.events
+from src.events import EventBroker, Subscriber, EVICTED, RESYNC, CLOSED, EVENTS_CHANNEL
+from src.routers.events import subscriber_to_sse
+
+
+class FakeConnection:
+    def __init__(self, healthy: bool = True):
+        self.healthy = healthy
+        self.listeners = dict()
+        self.termination_listeners = []
+        self.closed = False
+
+    def add_termination_listener(self, callback):
+        self.termination_listeners.append(callback)
+
+    async def add_listener(self, channel: str, callback):
+        self.listeners[channel] = callback
+
+    async def fetchval(self, query: str, timeout: float):
+        if not self.healthy:
+            raise ConnectionResetError("connection is gone")
+        return 1
+
+    def notify(self, payload: dict | str):
+        if not isinstance(payload, str):
+            payload = orjson.dumps(payload).decode()
+        self.listeners[EVENTS_CHANNEL](self, 1, EVENTS_CHANNEL, payload)
+
+    def lose(self):
+        self.closed = True
+        for callback in self.termination_listeners:
+            callback(self)
+
+    def is_closed(self) -> bool:
+        return self.closed
+
+    def terminate(self):
+        self.closed = True
+
+
+class FakeConnect:
+    # fails the first attempts, then hands out the prepared connections in order
+    def __init__(self, failures: int, connections: list[FakeConnection]):
+        self.failures = failures
+        self.connections = connections
+        self.attempts = 0
+        self.connected = asyncio.Event()
+
+    async def __call__(self, dsn: str):
+        self.attempts += 1
+        if self.failures:
+            self.failures -= 1
+            raise OSError("connection refused")
+        connection = self.connections.pop(0)
+        self.connected.set()
+        return connection
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    delays = []
+    sleep = asyncio.sleep
+
+    async def recording_sleep(delay, *args):
+        # asyncio is patched as a whole, the test's own sleep(0) yields are not backoff
+        if delay:
+            delays.append(delay)
+        await sleep(0)
+
+    monkeypatch.setattr(src.events.asyncio, "sleep", recording_sleep)
+    return delays
+
+
+def make_broker(queue_size: int = 10, health_check_interval: float = 30) -> EventBroker:
+    return EventBroker("postgresql://test", queue_size=queue_size, health_check_interval=health_check_interval,
+                       reconnect_backoff=1, max_reconnect_backoff=4)
+
+
+def notify(broker: EventBroker, payload: dict | str):
+    if not isinstance(payload, str):
+        payload = orjson.dumps(payload).decode()
+    broker._EventBroker__on_notification(None, 1, EVENTS_CHANNEL, payload)
+
+
+def drain(subscriber: Subscriber) -> list:
+    events = []
+    while not subscriber.queue.empty():
+        events.append(subscriber.queue.get_nowait())
+    return events
+
+
+def test_notification_goes_to_the_users_subscribers_only():
+    broker = make_broker()
+    first = Subscriber(1, 10)
+    second = Subscriber(1, 10)
+    other = Subscriber(2, 10)
+    for subscriber in (first, second, other):
+        broker.subscribers.setdefault(subscriber.user_id, set()).add(subscriber)
+
+    event = {"user_id": 1, "type": "category", "op": "update", "ids": [5]}
+    notify(broker, event)
+
+    assert drain(first) == drain(second) == [orjson.dumps(event)]
+    assert drain(other) == []
+    assert broker.delivered == 2
+
+
+def test_malformed_notification_is_ignored():
+    broker = make_broker()
+    subscriber = Subscriber(1, 10)
+    broker.subscribers[1] = {subscriber}
+
+    notify(broker, "not json")
+    notify(broker, {"type": "category"})
+    notify(broker, "[1, 2]")
+
+    assert drain(subscriber) == []
+    assert broker.subscribers_count() == 1
+
+
+def test_slow_consumer_is_evicted_when_its_queue_is_full():
+    broker = make_broker(queue_size=2)
+    slow = Subscriber(1, 2)
+    fast = Subscriber(1, 3)
+    broker.subscribers[1] = {slow, fast}
+
+    for id in range(3):
+        notify(broker, {"user_id": 1, "type": "task", "op": "create", "ids": [id]})
+
+    # the buffered events are dropped, the client only learns it has to reconnect
+    assert drain(slow) == [EVICTED]
+    assert len(drain(fast)) == 3
+    assert broker.subscribers == {1: {fast}}
+    assert broker.evicted == 1
+
+
+def test_listener_reconnects_with_backoff_and_asks_clients_to_resync(monkeypatch, delays):
+    first, second = FakeConnection(), FakeConnection()
+    connect = FakeConnect(failures=4, connections=[first, second])
+    monkeypatch.setattr(asyncpg, "connect", connect)
+
+    async def scenario():
+        broker = make_broker()
+        subscriber = broker.subscribe(1)
+        await asyncio.wait_for(connect.connected.wait(), 1)
+        await asyncio.sleep(0)
+        assert broker.connected
+        # doubling from reconnect_backoff, capped at max_reconnect_backoff
+        assert delays == [1, 2, 4, 4]
+
+        first.notify({"user_id": 1, "type": "category", "op": "delete", "ids": [3]})
+        assert drain(subscriber) == [b'{"user_id":1,"type":"category","op":"delete","ids":[3]}']
+
+        connect.connected.clear()
+        first.lose()
+        await asyncio.wait_for(connect.connected.wait(), 1)
+        await asyncio.sleep(0)
+        assert broker.connected
+        assert first.closed
+        # whatever was published while disconnected is lost
+        assert drain(subscriber) == [RESYNC]
+
+        second.notify({"user_id": 1, "type": "task", "op": "create", "ids": [1]})
+        assert len(drain(subscriber)) == 1
+
+        await broker.stop()
+        assert drain(subscriber) == [CLOSED]
+        assert broker.subscribers == dict()
+        assert broker.task is None
+
+    asyncio.run(scenario())
+
+
+def test_failed_health_check_reconnects(monkeypatch):
+    silent, replacement = FakeConnection(healthy=False), FakeConnection()
+    connect = FakeConnect(failures=0, connections=[silent, replacement])
+    monkeypatch.setattr(asyncpg, "connect", connect)
+
+    async def scenario():
+        broker = make_broker(health_check_interval=0.01)
+        subscriber = broker.subscribe(1)
+        async with asyncio.timeout(1):
+            while connect.attempts < 2 or not broker.connected:
+                await asyncio.sleep(0.01)
+        assert silent.closed
+        assert drain(subscriber) == [RESYNC]
+        await broker.stop()
+
+    asyncio.run(scenario())
+
+
+def collect_sse(subscriber: Subscriber, events: list, ping_interval: float = 30) -> list[bytes]:
+    async def scenario():
+        for event in events:
+            subscriber.queue.put_nowait(event)
+        return [chunk async for chunk in subscriber_to_sse(subscriber, ping_interval)]
+
+    return asyncio.run(scenario())
+
+
+def test_sse_stream_formats_events_until_evicted():
+    subscriber = Subscriber(1, 10)
+    src.events.event_broker.subscribers[1] = {subscriber}
+
+    chunks = collect_sse(subscriber, [b'{"user_id":1}', RESYNC, EVICTED, b'{"user_id":1}'])
+
+    assert chunks == [
+        b"retry: 5000\n\n",
+        b'event: change\ndata: {"user_id":1}\n\n',
+        b"event: resync\ndata: {}\n\n",
+        b"event: evicted\ndata: {}\n\n",
+    ]
+    # the stream unsubscribes on its way out
+    assert 1 not in src.events.event_broker.subscribers
+
+
+def test_sse_stream_ends_quietly_when_closed():
+    chunks = collect_sse(Subscriber(1, 10), [CLOSED])
+
+    assert chunks == [b"retry: 5000\n\n"]
+
+
+def test_sse_stream_pings_while_idle():
+    subscriber = Subscriber(1, 10)
+
+    async def scenario():
+        stream = subscriber_to_sse(subscriber, ping_interval=0.01)
+        chunks = [await anext(stream), await anext(stream)]
+        subscriber.close(CLOSED)
+        chunks += [chunk async for chunk in stream]
+        return chunks
+
+    assert asyncio.run(scenario()) == [b"retry: 5000\n\n", b": ping\n\n"]
@@ -0,0 +1,33 @@
+import asyncio
+
+import httpx
+import pytest
+
+import src.tokens
+from src.main import app
+
+
+def get(path: str, headers: dict | None = None) -> httpx.Response:
+    # no lifespan, these endpoints only read in-process state
+    async def request():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://internal") as client:
+            return await client.get(path, headers=headers)
+
+    return asyncio.run(request())
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/stats/pool", "/stats/reaper"])
+def test_internal_endpoints_are_off_without_a_token(monkeypatch, path):
+    monkeypatch.setattr(src.tokens, "INTERNAL_TOKEN", None)
+
+    assert get(path, {"Authorization": "Bearer anything"}).status_code == 404
+
+
+@pytest.mark.parametrize("path", ["/metrics", "/stats/pool", "/stats/reaper"])
+def test_internal_endpoints_need_the_token(monkeypatch, path):
+    monkeypatch.setattr(src.tokens, "INTERNAL_TOKEN", "secret")
+
+    assert get(path).status_code == 401
+    assert get(path, {"Authorization": "Bearer wrong"}).status_code == 401
+    assert get(path, {"Authorization": "Bearer secret"}).status_code == 200
@@ -0,0 +1,187 @@
+import asyncio
+import socket
+from email.message import EmailMessage
+
+import pytest
+from aiosmtpd.controller import Controller
+
+from src.mail import SMTPConnection, MailSender, MailQueueIsFull
+
+
+class RecordingHandler:
+    def __init__(self):
+        # the session objects are kept, so a new connection can't reuse the id of a closed one
+        self.sessions = []
+        self.delivered = []
+        self.rejections = dict()
+
+    async def handle_DATA(self, server, session, envelope):
+        recipient = envelope.rcpt_tos[0]
+        if self.rejections.get(recipient, 0) > 0:
+            self.rejections[recipient] -= 1
+            return "451 Try again later"
+        if not any(known is session for known in self.sessions):
+            self.sessions.append(session)
+        self.delivered.append(recipient)
+        return "250 OK"
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def smtp_server():
+    handler = RecordingHandler()
+    controller = Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+def make_connection(controller) -> SMTPConnection:
+    return SMTPConnection(controller.hostname, controller.port, None, None, starttls=False, timeout=5)
+
+
+def make_message(recipient: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = "sender@example.com"
+    message["To"] = recipient
+    message.set_content("confirm")
+    return message
+
+
+async def wait_for(condition, timeout: float = 5):
+    async with asyncio.timeout(timeout):
+        while not condition():
+            await asyncio.sleep(0.01)
+
+
+def test_connection_is_reused_across_messages(smtp_server):
+    controller, handler = smtp_server
+    connection = make_connection(controller)
+    try:
+        failed = connection.send_batch([make_message(f"user{i}@example.com") for i in range(3)])
+        connection.send(make_message("user3@example.com"))
+    finally:
+        connection.close()
+
+    assert failed == []
+    assert len(handler.delivered) == 4
+    assert len(handler.sessions) == 1
+
+
+def test_connection_reconnects_after_server_disconnect(smtp_server):
+    controller, handler = smtp_server
+    connection = make_connection(controller)
+    try:
+        connection.send(make_message("first@example.com"))
+        # the server forgets the idle connection
+        connection.smtp.sock.shutdown(socket.SHUT_RDWR)
+        connection.send(make_message("second@example.com"))
+    finally:
+        connection.close()
+
+    assert handler.delivered == ["first@example.com", "second@example.com"]
+    assert len(handler.sessions) == 2
+
+
+def test_sender_sends_queued_messages_in_batches(smtp_server):
+    controller, handler = smtp_server
+    batches = []
+
+    class RecordingConnection(SMTPConnection):
+        def send_batch(self, messages):
+            batches.append(len(messages))
+            return super().send_batch(messages)
+
+    async def scenario():
+        sender = MailSender(lambda: RecordingConnection(controller.hostname, controller.port, None, None,
+                                                        starttls=False, timeout=5),
+                            pool_size=1, batch_size=3, queue_size=10, max_retries=0, retry_backoff=0)
+        # nothing runs before the first await, so the worker finds all of them queued
+        for i in range(7):
+            sender.enqueue(make_message(f"user{i}@example.com"))
+        await sender.stop()
+
+    asyncio.run(scenario())
+
+    assert batches == [3, 3, 1]
+    assert len(handler.delivered) == 7
+    assert len(handler.sessions) == 1
+
+
+def test_sender_retries_with_backoff(smtp_server):
+    controller, handler = smtp_server
+    handler.rejections["retry@example.com"] = 2
+
+    async def scenario():
+        sender = MailSender(lambda: make_connection(controller), pool_size=1, batch_size=5, queue_size=10,
+                            max_retries=3, retry_backoff=0.05)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        sender.enqueue(make_message("retry@example.com"))
+        sender.enqueue(make_message("ok@example.com"))
+        await wait_for(lambda: "retry@example.com" in handler.delivered)
+        elapsed = loop.time() - started
+        await sender.stop()
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+
+    assert sorted(handler.delivered) == ["ok@example.com", "retry@example.com"]
+    # two retries wait 0.05 s and then 0.1 s
+    assert elapsed >= 0.15
+
+
+def test_sender_gives_up_after_max_retries(smtp_server):
+    controller, handler = smtp_server
+    handler.rejections["never@example.com"] = 100
+    attempts = []
+
+    class CountingConnection(SMTPConnection):
+        def send_batch(self, messages):
+            attempts.extend(message["To"] for message in messages)
+            return super().send_batch(messages)
+
+    async def scenario():
+        sender = MailSender(lambda: CountingConnection(controller.hostname, controller.port, None, None,
+                                                       starttls=False, timeout=5),
+                            pool_size=1, batch_size=5, queue_size=10, max_retries=2, retry_backoff=0.01)
+        sender.enqueue(make_message("never@example.com"))
+        await wait_for(lambda: len(attempts) == 3)
+        # no further retry is scheduled after the last attempt
+        await asyncio.sleep(0.1)
+        await sender.stop()
+
+    asyncio.run(scenario())
+
+    assert attempts == ["never@example.com"] * 3
+    assert handler.delivered == []
+
+
+def test_sender_backlog_is_bounded():
+    async def scenario():
+        sender = MailSender(lambda: SMTPConnection("127.0.0.1", 1, None, None, starttls=False),
+                            pool_size=1, batch_size=5, queue_size=2, max_retries=0, retry_backoff=0)
+        sender.enqueue(make_message("a@example.com"))
+        sender.enqueue(make_message("b@example.com"))
+        with pytest.raises(MailQueueIsFull):
+            sender.enqueue(make_message("c@example.com"))
+        assert sender.queue.qsize() == 2
+        await sender.stop(timeout=0)
+
+    asyncio.run(scenario())
+
+
+def test_stopped_sender_refuses_messages():
+    async def scenario():
+        sender = MailSender(lambda: SMTPConnection("127.0.0.1", 1, None, None, starttls=False),
+                            pool_size=1, batch_size=5, queue_size=2, max_retries=0, retry_backoff=0)
+        await sender.stop()
+        with pytest.raises(RuntimeError):
+            sender.enqueue(make_message("a@example.com"))
+
+    asyncio.run(scenario())
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+
+from src.metrics import RequestStats, request_stats, install_query_hooks, metrics, MetricsMiddleware
+
+
+class EngineStub:
+    # install_query_hooks only needs the sync engine behind an AsyncEngine
+    def __init__(self, sync_engine):
+        self.sync_engine = sync_engine
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    install_query_hooks(EngineStub(engine))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def stats():
+    stats = RequestStats()
+    token = request_stats.set(stats)
+    yield stats
+    request_stats.reset(token)
+
+
+def test_statements_are_timed(engine, stats):
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        connection.execute(text("SELECT 2"))
+
+    assert stats.queries == 2
+    assert stats.db_time > 0
+    assert stats.slowest_statement in ("SELECT 1", "SELECT 2")
+
+
+def test_failed_statement_leaves_nothing_on_the_connection(engine, stats):
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.execute(text("SELECT * FROM missing"))
+        connection.execute(text("SELECT 1"))
+        info = dict(connection.connection.info)
+
+    assert stats.queries == 2
+    assert "query_start" not in info
+
+
+def streaming_app(delay: float):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await asyncio.sleep(delay)
+        await send({"type": "http.response.body", "body": b"data: ping\n\n", "more_body": False})
+    return app
+
+
+def run_request(app, path: str) -> list[dict]:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": path}
+    asyncio.run(MetricsMiddleware(app, slow_request_ms=50)(scope, receive, send))
+    return sent
+
+
+def test_streamed_body_is_not_a_slow_request():
+    slow_requests = metrics.slow_requests
+
+    sent = run_request(streaming_app(delay=0.2), "/events")
+
+    assert sent[-1]["body"] == b"data: ping\n\n"
+    assert metrics.slow_requests == slow_requests
+    assert metrics.routes[("GET", "unmatched", 200)].duration < 0.05
+
+
+def test_slow_handler_is_a_slow_request():
+    async def app(scope, receive, send):
+        await asyncio.sleep(0.1)
+        await send({"type": "http.response.start", "status": 204, "headers": []})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+    slow_requests = metrics.slow_requests
+
+    sent = run_request(app, "/slow")
+
+    assert any(name == b"server-timing" for name, _ in sent[0]["headers"])
+    assert metrics.slow_requests == slow_requests + 1
@@ -0,0 +1,90 @@
+import asyncio
+import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from src.cache import MemoryCacheBackend
+from src.repository.users import UsersRepository
+
+
+NOW = datetime.datetime(2024, 6, 1)
+CREATED_BEFORE = NOW - datetime.timedelta(days=7)
+
+# only the columns the reaper reads, the real tables need postgres types
+SCHEMA = [
+    "CREATE TABLE users (id INTEGER PRIMARY KEY, is_email_verified BOOLEAN, created_at DATETIME)",
+    "CREATE TABLE sessions (id INTEGER PRIMARY KEY, user_id INTEGER, expires_in DATETIME)",
+    "CREATE TABLE categories (id INTEGER PRIMARY KEY, user_id INTEGER)",
+    "CREATE TABLE tasks (id INTEGER PRIMARY KEY, user_id INTEGER)",
+]
+
+
+class SyncSession:
+    # runs the repository statements on a sqlite connection
+    def __init__(self, connection):
+        self.connection = connection
+        self.sync_session = SimpleNamespace(info={})
+
+    async def execute(self, stmt):
+        return self.connection.execute(stmt)
+
+
+@pytest.fixture
+def connection():
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        for ddl in SCHEMA:
+            connection.execute(text(ddl))
+        yield connection
+    engine.dispose()
+
+
+def stamp(value: datetime.datetime) -> str:
+    # the format sqlalchemy stores datetimes in on sqlite, so the comparisons are by time
+    return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def add_user(connection, id: int, verified: bool = False, age: datetime.timedelta = datetime.timedelta(days=30)):
+    connection.execute(text("INSERT INTO users VALUES (:id, :verified, :created_at)"),
+                       {"id": id, "verified": verified, "created_at": stamp(NOW - age)})
+
+
+def delete_unverified(connection) -> int:
+    repo = UsersRepository(cache=MemoryCacheBackend(100, 300))
+    return asyncio.run(repo.delete_unverified(SyncSession(connection), CREATED_BEFORE, NOW, limit=100))
+
+
+def remaining_users(connection) -> list[int]:
+    return connection.execute(text("SELECT id FROM users ORDER BY id")).scalars().all()
+
+
+def test_abandoned_sign_ups_are_reaped(connection):
+    add_user(connection, 1)
+    add_user(connection, 2, verified=True)
+    add_user(connection, 3, age=datetime.timedelta(days=1))
+
+    assert delete_unverified(connection) == 1
+    assert remaining_users(connection) == [2, 3]
+
+
+def test_expired_sessions_do_not_keep_an_account(connection):
+    add_user(connection, 1)
+    connection.execute(text("INSERT INTO sessions VALUES (1, 1, :expires_in)"),
+                       {"expires_in": stamp(NOW - datetime.timedelta(hours=1))})
+
+    assert delete_unverified(connection) == 1
+
+
+@pytest.mark.parametrize("content", [
+    f"INSERT INTO sessions VALUES (1, 1, '{stamp(NOW + datetime.timedelta(hours=1))}')",
+    "INSERT INTO categories VALUES (1, 1)",
+    "INSERT INTO tasks VALUES (1, 1)",
+])
+def test_unverified_accounts_in_use_are_kept(connection, content):
+    add_user(connection, 1)
+    connection.execute(text(content))
+
+    assert delete_unverified(connection) == 0
+    assert remaining_users(connection) == [1]
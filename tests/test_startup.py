@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+
+# about twice what a worker takes on a developer machine, `python -X importtime` included;
+# a slower CI runner can raise them through the environment
+IMPORT_BUDGET_MS = os.environ.get("STARTUP_IMPORT_BUDGET_MS", "3000")
+FIRST_REQUEST_BUDGET_MS = os.environ.get("STARTUP_FIRST_REQUEST_BUDGET_MS", "4000")
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_startup_is_within_budget():
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--top", "10",
+         "--import-budget-ms", IMPORT_BUDGET_MS, "--first-request-budget-ms", FIRST_REQUEST_BUDGET_MS],
+        capture_output=True, text=True, cwd=ROOT
+    )
+
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "(status 200)" in result.stdout
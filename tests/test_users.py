@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+import src.mail
+from src.mail import MailQueueIsFull
+from src.schemas.users import UserCreateSchema
+from src.service.users import UsersService
+
+
+class FakeUsersRepository:
+    async def get_one(self, session, **filters):
+        return None
+
+    async def add_one(self, session, data: dict) -> int:
+        session.pending.append(("user", data["email"]))
+        return 1
+
+
+class FakeSessionsRepository:
+    async def add_one(self, session, data: dict) -> int:
+        session.pending.append(("session", data["user_id"]))
+        return 1
+
+
+class FakeSession:
+    def __init__(self):
+        self.pending = []
+        self.committed = []
+
+    async def commit(self):
+        self.committed.extend(self.pending)
+        self.pending = []
+
+    async def rollback(self):
+        self.pending = []
+
+
+class FakeMailSender:
+    def __init__(self, full: bool = False):
+        self.full = full
+        self.messages = []
+
+    def enqueue(self, message, attempt: int = 0):
+        if self.full:
+            raise MailQueueIsFull
+        self.messages.append(message)
+
+
+def sign_up(monkeypatch, session: FakeSession, mail_sender: FakeMailSender) -> dict:
+    monkeypatch.setattr(src.mail, "mail_sender", mail_sender)
+    service = UsersService(FakeUsersRepository(), FakeSessionsRepository())
+    user = UserCreateSchema(email="user@example.com", name="user", password="password")
+    return asyncio.run(service.create_user(session, user))
+
+
+def test_sign_up_commits_after_the_email_is_queued(monkeypatch):
+    session = FakeSession()
+    mail_sender = FakeMailSender()
+
+    tokens = sign_up(monkeypatch, session, mail_sender)
+
+    assert tokens["access_token"] and tokens["refresh_token"]
+    assert session.committed == [("user", "user@example.com"), ("session", 1)]
+    assert [message["To"] for message in mail_sender.messages] == ["user@example.com"]
+
+
+def test_full_mail_queue_rolls_the_sign_up_back(monkeypatch):
+    session = FakeSession()
+
+    with pytest.raises(MailQueueIsFull):
+        sign_up(monkeypatch, session, FakeMailSender(full=True))
+
+    assert session.committed == []
+    assert session.pending == []